@@ -0,0 +1,76 @@
+"""Time a large download over HTTP/2 on loopback.
+
+The client upgrades from HTTP/1.1 (h2c) to avoid TLS, and advertises
+large flow control windows so that the server's send path is measured.
+
+    python benchmarks/h2_download.py [size in MB]
+"""
+import asyncio
+import sys
+from time import perf_counter
+
+import h2.connection
+import h2.events
+import h2.settings
+
+from quart import Quart
+from quart.serving import Server
+
+WINDOW_SIZE = 2 ** 31 - 1
+
+
+async def download(loop: asyncio.AbstractEventLoop, port: int, size: int) -> float:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, loop=loop)
+    connection = h2.connection.H2Connection()
+    connection.local_settings = h2.settings.Settings(
+        client=True, initial_values={h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: WINDOW_SIZE},
+    )
+    settings = connection.initiate_upgrade_connection().decode()
+    start = perf_counter()
+    writer.write(
+        b'GET / HTTP/1.1\r\nHost: localhost\r\nConnection: Upgrade, HTTP2-Settings\r\n'
+        b'Upgrade: h2c\r\nHTTP2-Settings: ' + settings.encode() + b'\r\n\r\n',
+    )
+    await reader.readuntil(b'\r\n\r\n')  # The 101 response
+    connection.increment_flow_control_window(WINDOW_SIZE - 65535)
+    writer.write(connection.data_to_send())
+    received = 0
+    ended = False
+    while not ended:
+        data = await reader.read(2 ** 20)
+        for event in connection.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                received += len(event.data)
+                connection.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id,
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                ended = True
+        writer.write(connection.data_to_send())
+    elapsed = perf_counter() - start
+    writer.close()
+    assert received == size
+    return elapsed
+
+
+def main(size: int) -> None:
+    app = Quart(__name__)
+    body = b'a' * size
+
+    @app.route('/')
+    async def index() -> bytes:
+        return body
+
+    loop = asyncio.get_event_loop()
+    server = loop.run_until_complete(
+        loop.create_server(lambda: Server(app, loop, None, '', 60), '127.0.0.1', 0),
+    )
+    port = server.sockets[0].getsockname()[1]
+    timings = [loop.run_until_complete(download(loop, port, size)) for _ in range(3)]
+    best = min(timings)
+    print(f"{size / 2 ** 20:.0f} MB in {best:.3f}s, {size / 2 ** 20 / best:.0f} MB/s")
+    server.close()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1] if len(sys.argv) > 1 else 50) * 2 ** 20)
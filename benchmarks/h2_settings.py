@@ -0,0 +1,140 @@
+"""Time HTTP/2 uploads and concurrent requests on loopback with varied settings.
+
+The settings advertised by the server limit what the client sends, so
+the throughput of a large upload is measured for each frame and window
+size. The latency of many concurrent small requests is measured for
+each maximum number of concurrent streams and header table size. As
+in h2_download.py, the client upgrades from HTTP/1.1 (h2c).
+
+    python benchmarks/h2_settings.py
+"""
+import asyncio
+from statistics import mean
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import h2.connection
+import h2.events
+
+from quart import Quart, request
+from quart.serving import Server
+
+UPLOAD_SIZE = 32 * 2 ** 20
+REQUESTS = 1000
+HEADERS = [('user-agent', 'benchmark/1.0'), ('accept', '*/*'), ('cookie', 'a' * 200)]
+
+
+async def run_client(
+        loop: asyncio.AbstractEventLoop, port: int, requests: int, upload: Optional[bytes],
+) -> Tuple[float, List[float]]:
+    """Send the requests, as many concurrently as allowed, and time them."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, loop=loop)
+    connection = h2.connection.H2Connection()
+    settings = connection.initiate_upgrade_connection()
+    start = perf_counter()
+    writer.write(
+        b'GET / HTTP/1.1\r\nHost: localhost\r\nConnection: Upgrade, HTTP2-Settings\r\n'
+        b'Upgrade: h2c\r\nHTTP2-Settings: ' + settings + b'\r\n\r\n',
+    )
+    await reader.readuntil(b'\r\n\r\n')  # The 101 response
+    writer.write(connection.data_to_send())
+    started: Dict[int, float] = {1: start}
+    uploads: Dict[int, memoryview] = {}
+    latencies: List[float] = []
+    remaining = requests
+    while started:
+        data = await reader.read(2 ** 20)
+        for event in connection.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                connection.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id,
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                latencies.append(perf_counter() - started.pop(event.stream_id))
+        while remaining and len(started) < connection.remote_settings.max_concurrent_streams:
+            stream_id = connection.get_next_available_stream_id()
+            method = 'GET' if upload is None else 'POST'
+            connection.send_headers(
+                stream_id,
+                [(':method', method), (':path', '/'), (':authority', 'localhost'),
+                 (':scheme', 'http')] + HEADERS,
+                end_stream=upload is None,
+            )
+            started[stream_id] = perf_counter()
+            if upload is not None:
+                uploads[stream_id] = memoryview(upload)
+            remaining -= 1
+        for stream_id, view in list(uploads.items()):
+            window = min(
+                connection.local_flow_control_window(stream_id), len(view),
+            )
+            while window > 0:
+                size = min(window, connection.max_outbound_frame_size)
+                connection.send_data(stream_id, view[:size].tobytes())
+                view = view[size:]
+                window -= size
+            uploads[stream_id] = view
+            if not view:
+                connection.end_stream(stream_id)
+                del uploads[stream_id]
+        writer.write(connection.data_to_send())
+    elapsed = perf_counter() - start
+    writer.close()
+    return elapsed, latencies
+
+
+def measure(config: Dict[str, int], requests: int, upload: Optional[bytes]) -> None:
+    app = Quart(__name__)
+    app.config.update(config)
+
+    @app.route('/', methods=['GET', 'POST'])
+    async def index() -> str:
+        async for _ in request.body:
+            pass
+        return 'Hello'
+
+    loop = asyncio.get_event_loop()
+    server = loop.run_until_complete(
+        loop.create_server(lambda: Server(app, loop, None, '', 60), '127.0.0.1', 0),
+    )
+    port = server.sockets[0].getsockname()[1]
+    elapsed, latencies = min(
+        (loop.run_until_complete(run_client(loop, port, requests, upload)) for _ in range(3)),
+        key=lambda result: result[0],
+    )
+    settings = ', '.join(f"{key}={value}" for key, value in config.items())
+    if upload is None:
+        latencies = sorted(latencies)
+        print(
+            f"{settings}: {requests} requests in {elapsed:.3f}s, "
+            f"mean latency {mean(latencies) * 1000:.2f}ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms",
+        )
+    else:
+        size = len(upload) / 2 ** 20
+        print(f"{settings}: {size:.0f} MB upload in {elapsed:.3f}s, {size / elapsed:.0f} MB/s")
+    server.close()
+
+
+def main() -> None:
+    upload = b'a' * UPLOAD_SIZE
+    for frame_size, window_size in [
+            (2 ** 14, 2 ** 16 - 1), (2 ** 14, 2 ** 20), (2 ** 20, 2 ** 20), (2 ** 20, 2 ** 24),
+    ]:
+        measure(
+            {
+                'H2_MAX_FRAME_SIZE': frame_size, 'H2_INITIAL_WINDOW_SIZE': window_size,
+                'H2_CONNECTION_WINDOW_SIZE': window_size,
+            },
+            1, upload,
+        )
+    for max_streams in [1, 10, 100, 1000]:
+        for table_size in [0, 4096]:
+            measure(
+                {'H2_MAX_CONCURRENT_STREAMS': max_streams, 'H2_HEADER_TABLE_SIZE': table_size},
+                REQUESTS, None,
+            )
+
+
+if __name__ == '__main__':
+    main()
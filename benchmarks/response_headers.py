@@ -0,0 +1,30 @@
+"""Time the response headers added by the serving protocols.
+
+Compares the per response cost of the cached Date and prebuilt Server
+headers against formatting them for every response,
+
+    python benchmarks/response_headers.py
+"""
+import asyncio
+import timeit
+from email.utils import formatdate
+from time import time
+from unittest.mock import Mock
+
+from quart.serving._base import HTTPProtocol
+
+NUMBER = 100000
+
+
+def formatted_headers(protocol: str) -> list:
+    return [('date', formatdate(time(), usegmt=True)), ('server', f"quart-{protocol}")]
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    protocol = HTTPProtocol(Mock(), loop, Mock(), None, '', 5)
+    formatted = timeit.timeit(lambda: formatted_headers('h11'), number=NUMBER) / NUMBER
+    cached = timeit.timeit(protocol.response_headers, number=NUMBER) / NUMBER
+    print(f"Formatted per response: {formatted * 1e6:.2f}us")
+    print(f"Cached: {cached * 1e6:.2f}us")
+    print(f"Saving per response: {(formatted - cached) * 1e6:.2f}us")
@@ -0,0 +1,57 @@
+"""Time downloading a large file over HTTP/1.1 on loopback.
+
+The file is sent with send_file, and the peak memory (RSS) of the
+process is reported alongside the throughput,
+
+    python benchmarks/send_file.py [size in MB]
+"""
+import asyncio
+import resource
+import sys
+import tempfile
+from time import perf_counter
+
+from quart import Quart, send_file
+from quart.serving import Server
+
+
+async def download(loop: asyncio.AbstractEventLoop, port: int, size: int) -> float:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, loop=loop)
+    start = perf_counter()
+    writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    await reader.readuntil(b'\r\n\r\n')
+    received = 0
+    while received < size:
+        received += len(await reader.read(2 ** 20))
+    elapsed = perf_counter() - start
+    writer.close()
+    return elapsed
+
+
+def main(size: int) -> None:
+    app = Quart(__name__)
+    with tempfile.NamedTemporaryFile() as file_:
+        for _ in range(size // 2 ** 20):
+            file_.write(b'a' * 2 ** 20)
+        file_.flush()
+
+        @app.route('/')
+        async def index() -> bytes:
+            return await send_file(file_.name)
+
+        loop = asyncio.get_event_loop()
+        server = loop.run_until_complete(
+            loop.create_server(lambda: Server(app, loop, None, '', 60), '127.0.0.1', 0),
+        )
+        port = server.sockets[0].getsockname()[1]
+        best = min(loop.run_until_complete(download(loop, port, size)) for _ in range(3))
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(
+            f"{size / 2 ** 20:.0f} MB in {best:.3f}s, {size / 2 ** 20 / best:.0f} MB/s, "
+            f"peak RSS {peak:.0f} MB",
+        )
+        server.close()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1] if len(sys.argv) > 1 else 200) * 2 ** 20)
@@ -0,0 +1,44 @@
+"""Time serving a small static file, with and without the static cache.
+
+The static file is requested via the test client, so that the cost of
+the file system access (resolving, checking and reading the file) is
+measured alongside the routing,
+
+    python benchmarks/static_cache.py
+"""
+import asyncio
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from quart import Quart
+
+NUMBER = 2000
+
+
+async def serve(app: Quart) -> float:
+    test_client = app.test_client()
+    start = perf_counter()
+    for _ in range(NUMBER):
+        response = await test_client.get('/static/style.css')
+        await response.get_data()
+    return (perf_counter() - start) / NUMBER
+
+
+def main() -> None:
+    loop = asyncio.get_event_loop()
+    with tempfile.TemporaryDirectory() as directory:
+        (Path(directory) / 'style.css').write_bytes(b'body { color: black; }' * 200)
+        timings = {}
+        for max_size in [0, 2 ** 20]:
+            app = Quart(__name__, static_folder=directory, static_url_path='/static')
+            app.config['STATIC_CACHE_MAX_SIZE'] = max_size
+            timings[max_size] = min(loop.run_until_complete(serve(app)) for _ in range(3))
+        print(
+            f"{timings[0] * 1e6:.0f}us per request uncached, "
+            f"{timings[2 ** 20] * 1e6:.0f}us per request cached",
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Time building static urls and revalidating static files.
+
+With ``STATIC_FINGERPRINT`` configured url_for builds fingerprinted
+static urls from a cache, and clients need not revalidate the files.
+This compares the cost of building a static url with and without
+fingerprints, and the cost of the revalidation (304) request that
+fingerprinted files avoid,
+
+    python benchmarks/static_fingerprint.py
+"""
+import asyncio
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from quart import Quart, url_for
+
+NUMBER = 10000
+
+
+async def build_urls(app: Quart) -> float:
+    async with app.test_request_context('GET', '/'):
+        await app._get_static_fingerprints().load('app.js')  # Hashed in a thread
+        start = perf_counter()
+        for _ in range(NUMBER):
+            url_for('static', filename='app.js')
+        return (perf_counter() - start) / NUMBER
+
+
+async def revalidate(app: Quart) -> float:
+    test_client = app.test_client()
+    response = await test_client.get('/static/app.js')
+    headers = {'If-None-Match': response.headers['ETag']}
+    start = perf_counter()
+    for _ in range(NUMBER // 10):
+        response = await test_client.get('/static/app.js', headers=headers)
+        assert response.status_code == 304
+    return (perf_counter() - start) / (NUMBER // 10)
+
+
+def main() -> None:
+    loop = asyncio.get_event_loop()
+    with tempfile.TemporaryDirectory() as directory:
+        (Path(directory) / 'app.js').write_bytes(b'var a = 1;\n' * 1000)
+        timings = {}
+        for fingerprint in [False, True]:
+            app = Quart(__name__, static_folder=directory, static_url_path='/static')
+            app.config['STATIC_FINGERPRINT'] = fingerprint
+            timings[fingerprint] = min(loop.run_until_complete(build_urls(app)) for _ in range(3))
+        revalidation = min(loop.run_until_complete(revalidate(app)) for _ in range(3))
+        print(
+            f"url_for {timings[False] * 1e6:.1f}us plain, {timings[True] * 1e6:.1f}us "
+            f"fingerprinted, each avoided revalidation request {revalidation * 1e6:.0f}us",
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Time serving a compressed static file, precompressed or compressed per request.
+
+A gzip accepting client requests a 200 KB script via the test client,
+which is either compressed with gzip for each response or served from
+a precompressed sibling (``STATIC_PRECOMPRESSED``),
+
+    python benchmarks/static_precompressed.py
+"""
+import asyncio
+import gzip
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from quart import Quart, Response, send_file
+
+NUMBER = 500
+HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+
+
+async def serve(app: Quart, path: str) -> float:
+    test_client = app.test_client()
+    start = perf_counter()
+    for _ in range(NUMBER):
+        response = await test_client.get(path, headers=HEADERS)
+        await response.get_data()
+    return (perf_counter() - start) / NUMBER
+
+
+def main() -> None:
+    loop = asyncio.get_event_loop()
+    with tempfile.TemporaryDirectory() as directory:
+        data = b''.join(b'function f%d(a, b) { return a + b; }\n' % index for index in range(5000))
+        (Path(directory) / 'app.js').write_bytes(data)
+        (Path(directory) / 'app.js.gz').write_bytes(gzip.compress(data))
+        app = Quart(__name__, static_folder=directory, static_url_path='/static')
+        app.config['STATIC_PRECOMPRESSED'] = True
+
+        @app.route('/compressed/<path:file_name>')
+        async def compressed(file_name: str) -> Response:
+            response = await send_file(str(Path(directory) / file_name))
+            body = gzip.compress(await response.get_data())  # type: ignore
+            response = Response(body, mimetype='application/javascript')
+            response.headers['Content-Encoding'] = 'gzip'
+            return response
+
+        per_request, precompressed = (
+            min(loop.run_until_complete(serve(app, path)) for _ in range(3))
+            for path in ['/compressed/app.js', '/static/app.js']
+        )
+        print(
+            f"{len(data) / 1024:.0f} KB file, {per_request * 1e6:.0f}us per request compressed, "
+            f"{precompressed * 1e6:.0f}us per request precompressed",
+        )
+
+
+if __name__ == '__main__':
+    main()
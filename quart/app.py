@@ -735,6 +735,15 @@ class Quart(PackageStatic):
         for function in functions:
             function(endpoint, values)
 
+        if self.config['STATIC_FINGERPRINT'] and 'filename' in values:
+            package: Optional[PackageStatic] = None
+            if endpoint == 'static':
+                package = self
+            elif endpoint.endswith('.static'):
+                package = self.blueprints.get(endpoint.rsplit('.', 1)[0])
+            if package is not None and package.has_static_folder:
+                values['filename'] = package.static_fingerprint(values['filename'])
+
     def handle_url_build_error(self, error: Exception, endpoint: str, values: dict) -> str:
         """Handle a build error.
 
@@ -1044,6 +1053,11 @@ class Quart(PackageStatic):
             access_log_format: str="%(h)s %(r)s %(s)s %(b)s %(D)s",
             timeout: int=5,
             loop_handled: bool=False,
+            http1_parser: str='h11',
+            h2_max_concurrent_streams: Optional[int]=None,
+            h2_initial_window_size: Optional[int]=None,
+            h2_max_frame_size: Optional[int]=None,
+            h2_header_table_size: Optional[int]=None,
             **kwargs: Any,
     ) -> None:
         """Run this application.
@@ -1060,6 +1074,19 @@ class Quart(PackageStatic):
                 by default this is %(h)s %(r)s %(s)s %(b)s %(D)s.
             timeout: The keep alive equivalent timeout in seconds by
                 default this is 5 seconds.
+            http1_parser: The HTTP/1.1 parser to use, either h11 (the
+                default) or httptools if installed.
+            h2_max_concurrent_streams: The maximum number of
+                concurrent streams per HTTP/2 connection, by default
+                the H2_MAX_CONCURRENT_STREAMS config value.
+            h2_initial_window_size: The HTTP/2 per stream receive
+                window, by default the H2_INITIAL_WINDOW_SIZE config
+                value.
+            h2_max_frame_size: The largest HTTP/2 frame the client may
+                send, by default the H2_MAX_FRAME_SIZE config value.
+            h2_header_table_size: The size of the HTTP/2 header
+                compression table, by default the H2_HEADER_TABLE_SIZE
+                config value.
         """
         if kwargs:
             warnings.warn(
@@ -1073,7 +1100,10 @@ class Quart(PackageStatic):
             run_app(
                 self, host=host, port=port, ssl=ssl, logger=create_serving_logger(),
                 access_log_format=access_log_format, timeout=timeout, debug=debug,
-                loop_handled=loop_handled,
+                loop_handled=loop_handled, http1_parser=http1_parser,
+                h2_max_concurrent_streams=h2_max_concurrent_streams,
+                h2_initial_window_size=h2_initial_window_size,
+                h2_max_frame_size=h2_max_frame_size, h2_header_table_size=h2_header_table_size,
             )
         finally:
             # Reset the first request, so as to enable reuse.
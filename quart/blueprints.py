@@ -46,6 +46,8 @@ class Blueprint(PackageStatic):
     ) -> None:
         super().__init__(import_name, template_folder, root_path)
         self.name = name
+        self.static_folder = static_folder
+        self.static_url_path = static_url_path
         self.url_prefix = url_prefix
         self.deferred_functions: List[DeferedSetupFunction] = []
         self.subdomain = subdomain
@@ -543,6 +545,11 @@ class Blueprint(PackageStatic):
     ) -> None:
         """Register this blueprint on the app given."""
         state = self.make_setup_state(app, first_registration, url_prefix=url_prefix)
+        if self.has_static_folder:
+            state.add_url_rule(
+                f"{self.static_url_path}/<path:filename>", self.send_static_file,
+                endpoint='static',
+            )
         for func in self.deferred_functions:
             func(state)
 
@@ -12,7 +12,14 @@ from .helpers import get_debug_flag
 
 DEFAULT_CONFIG = {
     'APPLICATION_ROOT': None,
+    'BODY_HIGH_WATER_MARK': 64 * 1024,
     'DEBUG': get_debug_flag(default=False),
+    'H11_PIPELINE_DEPTH': 1,
+    'H2_CONNECTION_WINDOW_SIZE': 65535,
+    'H2_HEADER_TABLE_SIZE': 4096,
+    'H2_INITIAL_WINDOW_SIZE': 65535,
+    'H2_MAX_CONCURRENT_STREAMS': 100,
+    'H2_MAX_FRAME_SIZE': 16384,
     'JSON_AS_ASCII': True,
     'JSON_SORT_KEYS': True,
     'JSONIFY_MIMETYPE': 'application/json',
@@ -28,6 +35,11 @@ DEFAULT_CONFIG = {
     'SESSION_COOKIE_PATH': None,
     'SESSION_COOKIE_SECURE': False,
     'SESSION_REFRESH_EACH_REQUEST': True,
+    'STATIC_CACHE_MAX_FILE_SIZE': 256 * 1024,
+    'STATIC_CACHE_MAX_SIZE': 0,  # Disabled
+    'STATIC_CACHE_REVALIDATE_INTERVAL': 1,
+    'STATIC_FINGERPRINT': False,
+    'STATIC_PRECOMPRESSED': False,
     'TEMPLATES_AUTO_RELOAD': None,
     'TESTING': False,
 }
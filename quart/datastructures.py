@@ -144,13 +144,22 @@ class Accept:
             self.options.append(AcceptOption(option, quality, params))
 
     def best_match(self, matches: List[str], default: Optional[str]=None) -> Optional[str]:
-        best_match = AcceptOption(default, -1.0, {})
+        """Return the acceptable match with the highest quality.
+
+        A match with a quality of 0, including via a more specific
+        option than a wildcard that accepts it, is not acceptable.
+        """
+        best_match = AcceptOption(default, 0.0, {})
         for possible_match in matches:
-            for option in self.options:
-                if (
-                        self._values_match(possible_match, option.value) and
-                        option.quality > best_match.quality
-                ):
+            options = [
+                option for option in self.options
+                if self._values_match(possible_match, option.value)
+            ]
+            specific_options = [option for option in options if '*' not in option.value]
+            if specific_options:
+                options = specific_options
+            for option in options:
+                if option.quality > best_match.quality:
                     best_match = AcceptOption(possible_match, option.quality, {})
         return best_match.value
 
@@ -270,6 +279,7 @@ class RequestCacheControl(_CacheControl):
 
 
 class ResponseCacheControl(_CacheControl):
+    immutable = _CacheDirective('immutable', bool)
     must_revalidate = _CacheDirective('must-revalidate', bool)
     private = _CacheDirective('private', bool)
     proxy_revalidate = _CacheDirective('proxy-revalidate', bool)
@@ -292,6 +302,10 @@ class ETags:
     def __contains__(self, etag: str) -> bool:
         return self.star or etag in self.strong
 
+    def contains_weak(self, etag: str) -> bool:
+        """Return True if the etag matches by weak comparison."""
+        return etag in self or etag in self.weak
+
     @classmethod
     def from_header(cls: Type['ETags'], header: str) -> 'ETags':
         header = header.strip()
@@ -361,21 +375,38 @@ class Range:
 
         units = units.strip().lower()
         ranges = []
-        for range_set in parse_http_list(raw_ranges):
-            if range_set.startswith('-'):
-                ranges.append(RangeSet(int(range_set), None))
-            elif '-' in range_set:
-                begin, end = range_set.split('-')
-                ranges.append(RangeSet(int(begin), int(end)))
-            else:
-                ranges.append(RangeSet(0, int(range_set)))
+        try:
+            for range_set in parse_http_list(raw_ranges):
+                range_set = range_set.strip()
+                if range_set.startswith('-'):  # A suffix of the given length
+                    if int(range_set) == 0:
+                        # An empty, and so unsatisfiable, suffix
+                        ranges.append(RangeSet(0, -1))
+                    else:
+                        ranges.append(RangeSet(int(range_set), None))
+                elif range_set.endswith('-'):  # From the begin to the end
+                    ranges.append(RangeSet(int(range_set[:-1]), None))
+                elif '-' in range_set:
+                    begin, end = range_set.split('-')
+                    if int(end) < int(begin):
+                        raise ValueError()  # Invalid, so the header is ignored
+                    ranges.append(RangeSet(int(begin), int(end)))
+                else:
+                    ranges.append(RangeSet(0, int(range_set)))
+        except ValueError:
+            return cls('', [])
         return Range(units, ranges)
 
     def to_header(self) -> str:
         header = f"{self.units}="
         for range_set in self.ranges:
+            if range_set.end is not None and range_set.end < range_set.begin:
+                header += '-0,'
+                continue
             header += f"{range_set.begin}"
             if range_set.end is not None:
                 header += f"-{range_set.end}"
+            elif range_set.begin >= 0:
+                header += '-'
             header += ','
         return header.strip(',')
@@ -1,13 +1,17 @@
+import gc
+import os
+import pickle
 import re
 import uuid
 from ast import literal_eval
-from collections import defaultdict
-from typing import Any, Dict, Generator, List, NamedTuple, Optional, Set, Tuple, Union  # noqa
+from collections import defaultdict, OrderedDict
+from typing import Any, Dict, Generator, Hashable, List, NamedTuple, Optional, Set, Tuple, Union  # noqa
 from typing.re import Pattern  # noqa
 from urllib.parse import urlencode
 
 from sortedcontainers import SortedListWithKey
 
+from .__about__ import __version__
 from .exceptions import MethodNotAllowed, NotFound, RedirectRequired
 
 
@@ -35,11 +39,17 @@ CONVERTER_ARGS_RE = re.compile(r'''  # noqa
     )\s*,
 ''', re.VERBOSE | re.UNICODE)  # noqa
 
+# The types of the values which built urls are cached for
+_CACHEABLE_TYPES = {bool, float, int, str, type(None)}
+
 VariablePart = NamedTuple(
     'VariablePart',
     [('converter', Optional[str]), ('arguments', Tuple[List[Any], Dict[str, Any]]), ('name', str)],
 )
-WeightedPart = NamedTuple('Weight', [('converter', bool), ('weight', int)])
+WeightedPart = NamedTuple('WeightedPart', [('converter', bool), ('weight', int)])
+CacheInfo = NamedTuple(
+    'CacheInfo', [('hits', int), ('misses', int), ('maxsize', Optional[int]), ('currsize', int)],
+)
 
 
 class ValidationError(Exception):
@@ -53,6 +63,14 @@ class BuildError(Exception):
 class BaseConverter:
     regex = r'[^/]+'
     weight = 100
+    part_isolating = True
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)  # type: ignore
+        # A converter is only assumed to match within a single path
+        # segment if it says so, or if its regex cannot match a slash.
+        if 'regex' in cls.__dict__ and 'part_isolating' not in cls.__dict__:
+            cls.part_isolating = '/' not in cls.regex
 
     def to_python(self, value: str) -> Any:
         return value
@@ -77,11 +95,13 @@ class StringConverter(BaseConverter):
 class AnyConverter(BaseConverter):
     def __init__(self, *items: str) -> None:
         self.regex = '(?:%s)' % '|'.join((re.escape(x) for x in items))
+        self.part_isolating = not any('/' in item for item in items)
 
 
 class PathConverter(BaseConverter):
     regex = r'[^/].*?'
     weight = 200
+    part_isolating = False
 
 
 class IntegerConverter(BaseConverter):
@@ -157,16 +177,148 @@ class Map:
         'uuid': UUIDConverter,
     }
 
-    def __init__(self) -> None:
+    def __init__(
+            self, match_cache_size: Optional[int]=None, build_cache_size: Optional[int]=1024,
+    ) -> None:
+        """Create a Map.
+
+        Arguments:
+            match_cache_size: The number of match results, keyed by
+                host, path and method, to keep in a least recently
+                used cache. None (the default) disables the cache.
+            build_cache_size: The number of built urls, keyed by
+                endpoint, values, method, scheme and external, to keep
+                in a least recently used cache. None disables the
+                cache.
+        """
         self.rules = SortedListWithKey(key=lambda rule: rule.match_key)
         self.endpoints: Dict[str, SortedListWithKey] = defaultdict(lambda: SortedListWithKey(key=lambda rule: rule.build_key))  # noqa
         self.converters = self.default_converters.copy()
         self.host_matching = False
+        self._build_cache = _LRUCache(build_cache_size)
+        self._match_cache = _LRUCache(match_cache_size)
+        self._complex_defaults = False
+        self._snapshot: Dict[Tuple, Dict[str, Any]] = {}
+        self._static_rules: Dict[Tuple[str, str], Dict[str, Tuple[Any, Rule, bool]]] = defaultdict(dict)  # noqa: E501
+        self._tree = _RuleNode()
 
     def add(self, rule: 'Rule') -> None:
-        rule.bind(self)
+        compiled = None
+        if self._snapshot:
+            compiled = self._snapshot.get((rule.definition, self._converter_names()))
+        if compiled is not None:
+            rule.restore(self, compiled)
+        else:
+            rule.bind(self)
         self.endpoints[rule.endpoint].add(rule)
+        # Rules with equal match keys are matched in the order they
+        # were added, as within the sorted rules.
+        key = (rule.match_key, len(self.rules))
+        if rule.is_static:
+            self._add_static(rule, key)
+        else:
+            self._complex_defaults = self._complex_defaults or bool(rule.defaults)
+            self._tree.add(rule, key)
         self.rules.add(rule)
+        self._build_cache.clear()
+        self._match_cache.clear()
+
+    def _add_static(self, rule: 'Rule', key: Any) -> None:
+        """Index the rule by host and path, keeping the best rule per method."""
+        host = rule.host or ''
+        if not rule.is_leaf and rule.strict_slashes:
+            path = rule.rule.rstrip('/')
+            paths = [(f"{path}/", False), (path, True)]
+        else:
+            paths = [(rule.rule, False)]
+        for path, needs_slash in paths:
+            methods = self._static_rules[(host, path)]
+            for method in rule.methods:
+                if method not in methods or key < methods[method][0]:
+                    methods[method] = (key, rule, needs_slash)
+
+    def save_snapshot(self, path: str) -> None:
+        """Save the compiled rules to a snapshot file.
+
+        The snapshot can be loaded via :meth:`load_snapshot` e.g. by
+        each worker at startup, to avoid compiling the rules again.
+        """
+        snapshot = {
+            'version': __version__,
+            'rules': {
+                (rule.definition, self._converter_names()): rule.compiled_state()
+                for rule in self.rules
+            },
+        }
+        # Write then rename, so that concurrent workers never load a
+        # partially written snapshot.
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as file_:
+            pickle.dump(snapshot, file_, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    def load_snapshot(self, path: str) -> bool:
+        """Load a snapshot of compiled rules, see :meth:`save_snapshot`.
+
+        This should be called before rules are added, as any rule
+        added afterwards that matches a snapshot rule, with the same
+        converters, takes the compiled state rather than compiling
+        itself. Rules without a match are compiled as usual. Note the
+        file is unpickled, so it must be trusted.
+
+        Returns:
+            True if loaded, False if the snapshot is missing, invalid
+            or from a different version of Quart.
+        """
+        # Unpickling allocates many objects at once, which otherwise
+        # triggers repeated and pointless garbage collections.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, 'rb') as file_:
+                snapshot = pickle.load(file_)
+        except Exception:  # The snapshot is only an optimisation
+            return False
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if not isinstance(snapshot, dict) or snapshot.get('version') != __version__:
+            return False
+        self._snapshot = snapshot['rules']
+        return True
+
+    def _converter_names(self) -> Tuple[Tuple[str, str, str], ...]:
+        return tuple(sorted(
+            (
+                name, f"{converter.__module__}.{converter.__qualname__}",
+                converter.regex,  # type: ignore
+            )
+            for name, converter in self.converters.items()
+        ))
+
+    @property
+    def build_cache_size(self) -> Optional[int]:
+        return self._build_cache.maxsize
+
+    @build_cache_size.setter
+    def build_cache_size(self, value: Optional[int]) -> None:
+        self._build_cache.maxsize = value
+
+    def build_cache_info(self) -> CacheInfo:
+        """Return the hits, misses, maxsize and currsize of the build cache."""
+        return self._build_cache.info()
+
+    @property
+    def match_cache_size(self) -> Optional[int]:
+        return self._match_cache.maxsize
+
+    @match_cache_size.setter
+    def match_cache_size(self, value: Optional[int]) -> None:
+        self._match_cache.maxsize = value
+
+    def match_cache_info(self) -> CacheInfo:
+        """Return the hits, misses, maxsize and currsize of the match cache."""
+        return self._match_cache.info()
 
     def bind_to_request(
             self,
@@ -196,6 +348,9 @@ class MapAdapter:
         self.server_name = server_name
         self.path = path
         self.method = method
+        # The matches found whilst matching, kept so as to find the
+        # allowed methods (e.g. for OPTIONS) without matching again.
+        self._matched: Optional[List[Tuple['Rule', Dict[str, Any], bool]]] = None
 
     def build(
             self,
@@ -206,6 +361,33 @@ class MapAdapter:
             external: bool=False,
     )-> str:
         values = values or {}
+        if self.map.build_cache_size is None:
+            return self._build(endpoint, values, method, scheme, external)
+
+        # Only primitive values are cached, as other values may build
+        # differently over time (and would be kept alive). The value
+        # types are part of the key as e.g. 1 == True yet they build
+        # differently, and the order is as it determines the order of
+        # any query string.
+        if not all(type(value) in _CACHEABLE_TYPES for value in values.values()):
+            return self._build(endpoint, values, method, scheme, external)
+        items = tuple((key, type(value), value) for key, value in values.items())
+
+        key = (endpoint, items, method, scheme, external, self.scheme, self.server_name)
+        url = self.map._build_cache.get(key)
+        if url is None:
+            url = self._build(endpoint, values, method, scheme, external)
+            self.map._build_cache.set(key, url)
+        return url
+
+    def _build(
+            self,
+            endpoint: str,
+            values: dict,
+            method: Optional[str],
+            scheme: Optional[str],
+            external: bool,
+    ) -> str:
         for rule in self.map.endpoints[endpoint]:
             if rule.buildable(values, method=method):
                 path = rule.build(**values)
@@ -217,36 +399,200 @@ class MapAdapter:
         raise BuildError()
 
     def match(self) -> Tuple['Rule', Dict[str, Any]]:
-        allowed_methods: Set[str] = set()
-        for rule, variables, needs_slash in self._matches():
-            if self.method in rule.methods:
-                if needs_slash:
-                    raise RedirectRequired(rule.build(**variables))
+        if self.map.match_cache_size is None:
+            return self._match()
 
-                # Check if there is a default rule that can be used instead
-                for potential_rule in self.map.endpoints[rule.endpoint]:
-                    if potential_rule.provides_defaults_for(rule, **variables):
-                        raise RedirectRequired(potential_rule.build(**variables))
+        key = (self.server_name, self.path, self.method)
+        result = self.map._match_cache.get(key)
+        if result is not None:
+            rule, variables, error = result
+        else:
+            try:
+                rule, variables = self._match()
+            except (MethodNotAllowed, NotFound, RedirectRequired) as routing_error:
+                rule, variables, error = None, {}, routing_error
+            else:
+                error = None
+            self.map._match_cache.set(key, (rule, variables, error))
+        if error is not None:
+            # Avoid the cached error accumulating tracebacks
+            raise error.with_traceback(None)
+        # The view args are copied as they may be altered, e.g. by a
+        # url value preprocessor.
+        return rule, {**variables}
+
+    def _match(self) -> Tuple['Rule', Dict[str, Any]]:
+        static_match = self.map._static_rules.get((self.server_name or '', self.path), {}).get(self.method)  # noqa: E501
+        if static_match is not None:
+            _, rule, needs_slash = static_match
+            # Only complex rules with defaults are matched before
+            # static rules without.
+            if rule.defaults or not self.map._complex_defaults:
+                return self._match_rule(rule, {**rule.defaults}, needs_slash)
 
-                return rule, variables
+        allowed_methods: Set[str] = set()
+        self._matched = self._matches()
+        for rule, variables, needs_slash in self._matched:
+            if self.method in rule.methods:
+                return self._match_rule(rule, variables, needs_slash)
             else:
                 allowed_methods.update(rule.methods)
         if allowed_methods:
             raise MethodNotAllowed(allowed_methods=allowed_methods)
         raise NotFound()
 
+    def _match_rule(
+            self, rule: 'Rule', variables: Dict[str, Any], needs_slash: bool,
+    ) -> Tuple['Rule', Dict[str, Any]]:
+        if needs_slash:
+            raise RedirectRequired(rule.build(**variables))
+
+        # Check if there is a default rule that can be used instead
+        for potential_rule in self.map.endpoints[rule.endpoint]:
+            if potential_rule.provides_defaults_for(rule, **variables):
+                raise RedirectRequired(potential_rule.build(**variables))
+
+        return rule, variables
+
     def allowed_methods(self) -> Set[str]:
+        if self._matched is None:
+            self._matched = self._matches()
         allowed_methods: Set[str] = set()
-        for rule, *_ in self._matches():
+        for rule, *_ in self._matched:
             allowed_methods.update(rule.methods)
         return allowed_methods
 
-    def _matches(self) -> Generator[Tuple['Rule', Dict[str, Any], bool], None, None]:
-        full_path = "{}|{}".format(self.server_name or '', self.path)
-        for rule in self.map.rules:
+    def _matches(self) -> List[Tuple['Rule', Dict[str, Any], bool]]:
+        """Return the rules matching the host and path, in priority order."""
+        if not self.path.startswith('/'):
+            return []
+        host = self.server_name or ''
+        full_path = f"{host}|{self.path}"
+        segments = [host] + self.path.split('/')[1:]
+        matches = list(self.map._tree.find(segments, full_path))
+        static_rules = self.map._static_rules.get((host, self.path), {})
+        unique_static_rules = {
+            (rule, needs_slash): key for key, rule, needs_slash in static_rules.values()
+        }
+        for (rule, needs_slash), key in unique_static_rules.items():
+            matches.append((key, rule, {**rule.defaults}, needs_slash))
+        matches.sort(key=lambda match: match[0])
+        return [(rule, variables, needs_slash) for _, rule, variables, needs_slash in matches]
+
+
+class _LRUCache:
+    """A size bounded, least recently used, cache.
+
+    A maxsize of None disables the cache, with nothing stored.
+    """
+
+    def __init__(self, maxsize: Optional[int]) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for the key, or None if not cached."""
+        if self.maxsize is None:
+            return None
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize is None:
+            return
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+
+class _RuleNode:
+    """A node in the segment tree used to match rules.
+
+    The first level of the tree is the host, with each subsequent
+    level a path segment. Children are keyed by the literal segment,
+    or for segments with converted parts by the segment pattern.
+    Rules with a converter that can match across segments, e.g. path,
+    are stored as tails on the node their isolated prefix leads to
+    and are checked against the full path via their pattern.
+    """
+    __slots__ = ('dynamic', 'rules', 'static', 'tails')
+
+    def __init__(self) -> None:
+        self.dynamic: Dict[str, Tuple[Pattern, _RuleNode]] = {}
+        self.rules: List[Tuple[Any, 'Rule']] = []
+        self.static: Dict[str, _RuleNode] = {}
+        self.tails: List[Tuple[Any, 'Rule']] = []
+
+    def add(self, rule: 'Rule', key: Any) -> None:
+        node = self
+        for segment in rule._segments:
+            if isinstance(segment, str):
+                node = node.static.setdefault(segment, _RuleNode())
+            else:
+                if segment.pattern not in node.dynamic:
+                    node.dynamic[segment.pattern] = (segment, _RuleNode())
+                node = node.dynamic[segment.pattern][1]
+        if rule._part_isolating:
+            node.rules.append((key, rule))
+        else:
+            node.tails.append((key, rule))
+
+    def find(
+            self,
+            segments: List[str],
+            full_path: str,
+            index: int=0,
+            values: Optional[Dict[str, str]]=None,
+    ) -> Generator[Tuple[Any, 'Rule', Dict[str, Any], bool], None, None]:
+        """Yield the key, rule, variables and needs_slash of each match."""
+        values = values or {}
+        for key, rule in self.tails:
             variables, needs_slash = rule.match(full_path)
             if variables is not None:
-                yield rule, variables, needs_slash
+                yield key, rule, variables, needs_slash
+
+        if index == len(segments):
+            for key, rule in self.rules:
+                variables = rule._convert(values)
+                if variables is not None:
+                    yield key, rule, variables, False
+            # Branch rules match without the trailing slash in strict
+            # slashes mode, yet require a redirect.
+            slash_node = self.static.get('')
+            if slash_node is not None:
+                for key, rule in slash_node.rules:
+                    if rule.strict_slashes:
+                        variables = rule._convert(values)
+                        if variables is not None:
+                            yield key, rule, variables, True
+            return
+
+        segment = segments[index]
+        child = self.static.get(segment)
+        if child is not None:
+            yield from child.find(segments, full_path, index + 1, values)
+        for pattern, child in self.dynamic.values():
+            match = pattern.fullmatch(segment)
+            if match is not None:
+                yield from child.find(
+                    segments, full_path, index + 1, {**values, **match.groupdict()},
+                )
 
 
 class Rule:
@@ -279,9 +625,14 @@ class Rule:
         self.host = host
         self.map: Optional[Map] = None
         self._pattern: Optional[Pattern] = None
-        self._builder: Optional[str] = None
+        self._pattern_source = ''
+        self._builder: List[Tuple[Optional[BaseConverter], str]] = []
+        self._build_keys: frozenset = frozenset()
+        self._static_path: Optional[str] = None
         self._converters: Dict[str, BaseConverter] = {}
         self._weights: List[WeightedPart] = []
+        self._segments: List[Union[str, Pattern]] = []
+        self._part_isolating = True
         self.provide_automatic_options = provide_automatic_options
 
     def __repr__(self) -> str:
@@ -293,6 +644,10 @@ class Rule:
         If it does it returns a dict of matched and converted values,
         otherwise None is returned.
         """
+        if self._pattern is None:
+            # Compiled lazily, as only rules matched against the full
+            # path (see _RuleNode) need the pattern.
+            self._pattern = re.compile(self._pattern_source)
         match = self._pattern.match(path)
         if match is not None:
             # If the route is a branch (not leaf) and the path is
@@ -301,19 +656,34 @@ class Rule:
             needs_slash = (
                 self.strict_slashes and not self.is_leaf and match.groupdict()['__slash__'] != '/'
             )
-            try:
-                converted_varaibles = {
-                    name: self._converters[name].to_python(value)
-                    for name, value in match.groupdict().items()
-                    if name != '__slash__'
-                }
-            except ValidationError:  # Doesn't meet conversion rules, no match
+            variables = self._convert({
+                name: value for name, value in match.groupdict().items() if name != '__slash__'
+            })
+            if variables is None:
                 return None, False
             else:
-                return {**self.defaults, **converted_varaibles}, needs_slash
+                return variables, needs_slash
         else:
             return None, False
 
+    def _convert(self, values: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Convert the matched values, returning None if they are invalid."""
+        try:
+            converted_varaibles = {
+                name: self._converters[name].to_python(value) for name, value in values.items()
+            }
+        except ValidationError:  # Doesn't meet conversion rules, no match
+            return None
+        else:
+            return {**self.defaults, **converted_varaibles}
+
+    @property
+    def is_static(self) -> bool:
+        """True if the rule (including host) has no converted parts."""
+        if self.map is None:
+            raise RuntimeError(f"{self!r} is not bound to a Map")
+        return not self._converters
+
     def provides_defaults_for(self, rule: 'Rule', **values: Any) -> bool:
         """Returns true if this rule provides defaults for the argument and values."""
         defaults_match = all(
@@ -323,18 +693,17 @@ class Rule:
 
     def build(self, **values: Any) -> str:
         """Build this rule into a path using the values given."""
-        converted_values = {
-            key: self._converters[key].to_url(value)
-            for key, value in values.items()
-            if key in self._converters
-        }
-        result = self._builder.format(**converted_values).split('|', 1)[1]
+        if self._static_path is not None:
+            result = self._static_path
+        else:
+            result = ''.join([
+                value if converter is None else str(converter.to_url(values[value]))
+                for converter, value in self._builder
+            ])
+        if values.keys() <= self._build_keys:
+            return result
         query_string = urlencode(
-            {
-                key: value
-                for key, value in values.items()
-                if key not in self._converters and key not in self.defaults
-            },
+            {key: value for key, value in values.items() if key not in self._build_keys},
         )
         if query_string:
             result = "{}?{}".format(result, query_string)
@@ -347,7 +716,32 @@ class Rule:
         defaults_match = all(
             values[key] == self.defaults[key] for key in self.defaults if key in values
         )
-        return defaults_match and set(values.keys()) >= set(self._converters.keys())
+        return defaults_match and values.keys() >= self._converters.keys()
+
+    @property
+    def definition(self) -> Tuple:
+        """The arguments that define this rule, excluding the map."""
+        return (
+            f"{type(self).__module__}.{type(self).__qualname__}", self.rule,
+            tuple(sorted(self.methods)), self.endpoint, self.strict_slashes,
+            repr(sorted(self.defaults.items())), self.host, self.provide_automatic_options,
+            self.is_websocket,
+        )
+
+    def compiled_state(self) -> Dict[str, Any]:
+        """Return the state created by compiling this rule on binding."""
+        if self.map is None:
+            raise RuntimeError(f"{self!r} is not bound to a Map")
+        return {name: getattr(self, name) for name in _COMPILED_ATTRIBUTES}
+
+    def restore(self, map: Map, compiled_state: Dict[str, Any]) -> None:
+        """Bind the Rule to a Map using a previously compiled state."""
+        if self.map is not None:
+            raise RuntimeError(f"{self!r} is already bound to {self.map!r}")
+
+        self.map = map
+        for name in _COMPILED_ATTRIBUTES:
+            setattr(self, name, compiled_state[name])
 
     def bind(self, map: Map) -> None:
         """Bind the Rule to a Map and compile it."""
@@ -357,28 +751,96 @@ class Rule:
         self.map = map
 
         pattern = ''
-        builder = ''
-        full_rule = "{}\\|{}".format(self.host or '', self.rule)
-        for part in _parse_rule(full_rule):
+        builder: List[Tuple[Optional[BaseConverter], str]] = []
+        full_rule = "{}|{}".format(self.host or '', self.rule)
+        strict_branch = not self.is_leaf and self.strict_slashes
+        parts = list(_parse_rule(full_rule))
+        for index, part in enumerate(parts):
             if isinstance(part, VariablePart):
                 converter = self.map.converters[part.converter](
                     *part.arguments[0], **part.arguments[1],
                 )
                 pattern += f"(?P<{part.name}>{converter.regex})"
                 self._converters[part.name] = converter
-                builder += '{' + part.name + '}'
+                builder.append((converter, part.name))
                 self._weights.append(WeightedPart(True, converter.weight))
             else:
-                builder += part
-                pattern += part
+                builder.append((None, part))
+                if strict_branch and index == len(parts) - 1:
+                    # Pattern should match with or without a trailing slash
+                    pattern += re.escape(part.rstrip('/'))
+                else:
+                    pattern += re.escape(part)
                 self._weights.append(WeightedPart(False, -len(part)))
-        if not self.is_leaf and self.strict_slashes:
-            # Pattern should match with or without a trailing slash
-            pattern = f"{pattern.rstrip('/')}(?<!/)(?P<__slash__>/?)$"
+        if strict_branch:
+            pattern = f"{pattern}(?<!/)(?P<__slash__>/?)$"
         else:
             pattern = f"{pattern}$"
-        self._pattern = re.compile(pattern)
-        self._builder = builder
+        self._pattern_source = pattern
+        self._compile_builder(builder)
+        self._compile_segments(parts, strict_branch)
+
+    def _compile_builder(self, builder: List[Tuple[Optional[BaseConverter], str]]) -> None:
+        """Compile the builder parts for the path, discarding the host.
+
+        Each part is either a converter and variable name, or None
+        and static text.
+        """
+        for index, (converter, value) in enumerate(builder):
+            if converter is None and '|' in value:
+                self._builder = builder[index:]
+                self._builder[0] = (None, value.split('|', 1)[1])
+                break
+        if all(converter is None for converter, _ in self._builder):
+            self._static_path = ''.join(value for _, value in self._builder)
+        self._build_keys = frozenset(self._converters) | frozenset(self.defaults)
+
+    def _compile_segments(
+            self, parts: List[Union[str, VariablePart]], strict_branch: bool,
+    ) -> None:
+        """Split the parts into the host and path segments for the tree.
+
+        Only the segments before any that contain a converter able to
+        match across segments are kept, as the remainder must be
+        matched via the full pattern.
+        """
+        segments: List[List[Union[str, VariablePart]]] = [[]]
+        separated = False
+        for part in parts:
+            if isinstance(part, VariablePart):
+                segments[-1].append(part)
+            else:
+                if not separated and '|/' in part:
+                    # The host and path are separated by '|/'
+                    part = part.replace('|/', '/', 1)
+                    separated = True
+                first, *rest = part.split('/')
+                segments[-1].append(first)
+                segments.extend([piece] for piece in rest)
+        if strict_branch:
+            # Repeated trailing slashes are matched as one, as the
+            # pattern strips them.
+            while len(segments) > 2 and segments[-1] == segments[-2] == ['']:
+                segments.pop()
+
+        for segment in segments:
+            if all(isinstance(piece, str) for piece in segment):
+                self._segments.append(''.join(segment))  # type: ignore
+            elif all(
+                    self._converters[piece.name].part_isolating
+                    for piece in segment if isinstance(piece, VariablePart)
+            ):
+                segment_pattern = ''
+                for piece in segment:
+                    if isinstance(piece, VariablePart):
+                        regex = self._converters[piece.name].regex
+                        segment_pattern += f"(?P<{piece.name}>{regex})"
+                    else:
+                        segment_pattern += re.escape(piece)
+                self._segments.append(re.compile(segment_pattern))
+            else:
+                self._part_isolating = False
+                break
 
     @property
     def match_key(self) -> Tuple[bool, bool, int, List[WeightedPart]]:
@@ -416,6 +878,12 @@ class Rule:
         return (not bool(self.defaults), -sum(1 for weight in self._weights if weight.converter))
 
 
+_COMPILED_ATTRIBUTES = (
+    '_build_keys', '_builder', '_converters', '_part_isolating', '_pattern_source', '_segments',
+    '_static_path', '_weights',
+)
+
+
 def _parse_rule(rule: str) -> Generator[Union[str, VariablePart], None, None]:
     variable_names: Set[str] = set()
     final_match = 0
@@ -1,10 +1,14 @@
 import asyncio
+import warnings
+from functools import lru_cache
 from logging import Logger
 from ssl import SSLContext
-from typing import Dict, List, Optional, Tuple, TYPE_CHECKING, Union  # noqa: F401
+from typing import Dict, List, Optional, Tuple, Type, TYPE_CHECKING, Union  # noqa: F401
 
+from ._timer import TimerWheel
 from .h11 import H11Server, H2CProtocolRequired, WebsocketProtocolRequired
 from .h2 import H2Server
+from .httptools import httptools, HTTPToolsServer
 from .websocket import WebsocketServer
 from ..wrappers import Request, Response  # noqa: F401
 
@@ -12,6 +16,19 @@ if TYPE_CHECKING:
     from ._base import HTTPProtocol  # noqa
     from ..app import Quart  # noqa
 
+HTTP1_PARSERS = ('h11', 'httptools')
+
+
+@lru_cache()
+def _http1_server_class(parser: str) -> Type[Union[H11Server, HTTPToolsServer]]:
+    if parser not in HTTP1_PARSERS:
+        raise ValueError(f"Unknown HTTP/1.1 parser {parser}, expected one of {HTTP1_PARSERS}")
+    elif parser == 'httptools':
+        if httptools is not None:
+            return HTTPToolsServer
+        warnings.warn('httptools is not installed, falling back to the h11 parser')
+    return H11Server
+
 
 class Server(asyncio.Protocol):
     __slots__ = (
@@ -27,6 +44,8 @@ class Server(asyncio.Protocol):
             timeout: int,
             *,
             h11_max_incomplete_size: Optional[int]=None,
+            timer_wheel: Optional[TimerWheel]=None,
+            http1_parser: str='h11',
     ) -> None:
         self.app = app
         self.loop = loop
@@ -35,6 +54,9 @@ class Server(asyncio.Protocol):
         self.access_log_format = access_log_format
         self.timeout = timeout
         self.h11_max_incomplete_size = h11_max_incomplete_size
+        # The timer wheel should be shared by the connections of a server
+        self.timer_wheel = timer_wheel if timer_wheel is not None else TimerWheel(loop)
+        self.http1_server_class = _http1_server_class(http1_parser)
         self._ssl_enabled = False
 
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
@@ -48,12 +70,13 @@ class Server(asyncio.Protocol):
         if protocol == 'h2':
             self._server = H2Server(
                 self.app, self.loop, transport, self.logger, self.access_log_format,
-                self.timeout,
+                self.timeout, timer_wheel=self.timer_wheel,
             )
         else:
-            self._server = H11Server(
+            self._server = self.http1_server_class(
                 self.app, self.loop, transport, self.logger, self.access_log_format,
                 self.timeout, max_incomplete_size=self.h11_max_incomplete_size,
+                timer_wheel=self.timer_wheel,
             )
 
     def connection_lost(self, exception: Exception) -> None:
@@ -69,9 +92,15 @@ class Server(asyncio.Protocol):
         except H2CProtocolRequired as error:
             self._server = H2Server(
                 self.app, self.loop, self._server._transport, self.logger, self.access_log_format,
-                self.timeout, upgrade_request=error.request,
+                self.timeout, upgrade_request=error.request, timer_wheel=self.timer_wheel,
             )
 
+    def pause_writing(self) -> None:
+        self._server.pause_writing()
+
+    def resume_writing(self) -> None:
+        self._server.resume_writing()
+
     def eof_received(self) -> bool:
         if self._ssl_enabled:
             # Returning anything other than False has no affect under
@@ -91,6 +120,11 @@ def run_app(
         timeout: int,
         debug: bool=False,
         loop_handled: bool=False,
+        http1_parser: str='h11',
+        h2_max_concurrent_streams: Optional[int]=None,
+        h2_initial_window_size: Optional[int]=None,
+        h2_max_frame_size: Optional[int]=None,
+        h2_header_table_size: Optional[int]=None,
 ) -> None:
     """Create a server to run the app on given the options.
 
@@ -100,10 +134,27 @@ def run_app(
         port: The port to listen on.
         ssl: Optional SSLContext to use.
         logger: Optional logger for serving (access) logs.
+        http1_parser: The HTTP/1.1 parser to use, either h11 or
+            httptools (if installed).
+        h2_max_concurrent_streams: Overrides the app's
+            H2_MAX_CONCURRENT_STREAMS config value, as do the other
+            h2 arguments their equivalent config values.
     """
+    h2_settings = {
+        'H2_HEADER_TABLE_SIZE': h2_header_table_size,
+        'H2_INITIAL_WINDOW_SIZE': h2_initial_window_size,
+        'H2_MAX_CONCURRENT_STREAMS': h2_max_concurrent_streams,
+        'H2_MAX_FRAME_SIZE': h2_max_frame_size,
+    }
+    app.config.update({key: value for key, value in h2_settings.items() if value is not None})
+
     async def create_server() -> asyncio.AbstractServer:
+        timer_wheel = TimerWheel(loop)
         server = await loop.create_server(
-            lambda: Server(app, loop, logger, access_log_format, timeout),
+            lambda: Server(
+                app, loop, logger, access_log_format, timeout, timer_wheel=timer_wheel,
+                http1_parser=http1_parser,
+            ),
             host, port, ssl=ssl,
         )
 
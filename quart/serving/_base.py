@@ -1,17 +1,53 @@
 import asyncio
+import os
 from email.utils import formatdate
 from functools import partial
 from logging import Logger
 from time import time
-from typing import Dict, List, Optional, Tuple, TYPE_CHECKING, Union  # noqa: F401
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING, Union  # noqa: F401
 
+from ._timer import Timed, TimerWheel
 from ..datastructures import CIMultiDict
 from ..logging import AccessLogAtoms
-from ..wrappers import Request, Response  # noqa: F401
+from ..wrappers import FileBody, Request, Response  # noqa: F401
 
 if TYPE_CHECKING:
     from ..app import Quart  # noqa
 
+MAX_WRITE_BUFFER_SIZE = 64 * 1024
+# The errors raised by loop.sendfile if the loop or transport cannot
+# sendfile (SendfileNotAvailableError is Python 3.7+).
+SENDFILE_UNAVAILABLE_ERRORS = (
+    NotImplementedError, getattr(asyncio, 'SendfileNotAvailableError', NotImplementedError),
+)
+
+
+class _DateHeader:
+    """The Date header, formatted at most once per second."""
+    __slots__ = ('header', 'second')
+
+    def __init__(self) -> None:
+        self.header = ('date', '')
+        self.second: Optional[int] = None
+
+    def get(self) -> Tuple[str, str]:
+        now = time()
+        if int(now) != self.second:
+            self.second = int(now)
+            self.header = ('date', formatdate(now, usegmt=True))
+        return self.header
+
+
+_date_header = _DateHeader()
+
+
+def decode_headers(headers: Iterable[Tuple[bytes, bytes]]) -> CIMultiDict:
+    """Decode the received headers, keeping the names as received.
+
+    The names are not title cased, as the lookups are case insensitive.
+    """
+    return CIMultiDict([(name.decode(), value.decode()) for name, value in headers])
+
 
 class Stream:
     __slots__ = ('buffer', 'request', 'task')
@@ -27,7 +63,7 @@ class Stream:
         self.request.body.set_complete()
 
 
-class HTTPProtocol:
+class HTTPProtocol(Timed):
 
     protocol = ''
     stream_class = Stream
@@ -40,6 +76,8 @@ class HTTPProtocol:
             logger: Optional[Logger],
             access_log_format: str,
             timeout: int,
+            *,
+            timer_wheel: Optional[TimerWheel]=None,
     ) -> None:
         self.app = app
         self.loop = loop
@@ -47,19 +85,32 @@ class HTTPProtocol:
         self.streams: Dict[int, Stream] = {}
         self.access_log_format = access_log_format
         self._timeout = timeout
-        self._last_activity = time()
-        self._timeout_handle = self.loop.call_later(self._timeout, self._handle_timeout)
+        self._timer_wheel = timer_wheel if timer_wheel is not None else TimerWheel(loop)
+        self._timer_wheel.schedule(self, self._timeout)
         self._transport = transport
+        self._server_header = ('server', f"quart-{self.protocol}")
+        self._can_write = asyncio.Event()
+        self._can_write.set()
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._reading_paused = False
+        self._write_buffer: List[bytes] = []
+        self._write_buffer_size = 0
 
     def connection_lost(self, _: Exception) -> None:
         self.close()
 
     def data_received(self, data: bytes) -> None:
-        self._last_activity = time()
+        self._timer_wheel.refresh(self)
 
     def eof_received(self) -> bool:
         return True
 
+    def pause_writing(self) -> None:
+        self._can_write.clear()
+
+    def resume_writing(self) -> None:
+        self._can_write.set()
+
     def handle_request(
             self,
             stream_id: int,
@@ -67,7 +118,7 @@ class HTTPProtocol:
             path: str,
             headers: CIMultiDict,
     ) -> None:
-        self._timeout_handle.cancel()
+        self._timer_wheel.cancel(self)
         headers['Remote-Addr'] = self._transport.get_extra_info('peername')[0]
         scheme = 'https' if self._transport.get_extra_info('ssl_object') is not None else 'http'
         request = self.app.request_class(
@@ -75,6 +126,12 @@ class HTTPProtocol:
             max_content_length=self.app.config['MAX_CONTENT_LENGTH'],
         )
         self.streams[stream_id] = self.stream_class(self.loop, request)
+        high_water_mark = self.app.config['BODY_HIGH_WATER_MARK']
+        if high_water_mark is not None:
+            request.body.set_flow_control(
+                high_water_mark, partial(self._pause_receiving, stream_id),
+                partial(self._resume_receiving, stream_id),
+            )
         # It is important that the app handles the request in a unique
         # task as the globals are task locals
         self.streams[stream_id].task = asyncio.ensure_future(self._handle_request(stream_id))
@@ -99,20 +156,133 @@ class HTTPProtocol:
     async def send_response(self, stream_id: int, response: Response, suppress_body: bool) -> None:
         raise NotImplemented()
 
+    def _pause_receiving(self, stream_id: int) -> None:
+        """Pause receiving data for the stream, its body is full."""
+        if not self._reading_paused:
+            self._reading_paused = True
+            self._transport.pause_reading()  # type: ignore
+
+    def _resume_receiving(self, stream_id: int) -> None:
+        """Resume receiving data for the stream."""
+        if self._reading_paused:
+            self._reading_paused = False
+            self._transport.resume_reading()  # type: ignore
+
     def send(self, data: bytes) -> None:
-        self._last_activity = time()
+        self._timer_wheel.refresh(self)
         self._transport.write(data)  # type: ignore
 
+    async def drain(self) -> None:
+        """Wait whilst the transport's write buffer is above its high water mark.
+
+        This should be awaited after sending data, as the transport
+        otherwise buffers without limit for a slow client.
+        """
+        await self._can_write.wait()
+
+    def _buffer(self, data: bytes) -> None:
+        """Buffer the data to be sent with any other in this loop iteration.
+
+        This coalesces the writes of a response, such that small
+        responses are sent in a single write and streamed responses
+        in a write per iteration of the event loop.
+        """
+        self._write_buffer.append(data)
+        self._write_buffer_size += len(data)
+        if self._flush_handle is None:
+            self._flush_handle = self.loop.call_soon(self._flush)
+
+    async def _drain_buffer(self) -> None:
+        """Flush the buffer if it is large, then wait for the transport to drain."""
+        if self._write_buffer_size >= MAX_WRITE_BUFFER_SIZE:
+            self._flush()
+        await self.drain()
+
+    async def _send_file_body(self, body: FileBody) -> None:
+        """Send the file body, directly from the file to the socket if possible.
+
+        This is only possible for plain TCP connections, otherwise the
+        file is read in chunks and buffered. The transport's buffer
+        must be empty to send directly, so a chunk is buffered and
+        drained whenever the socket is full.
+        """
+        socket_ = self._transport.get_extra_info('socket')
+        if (
+                socket_ is None or self._transport.get_extra_info('ssl_object') is not None or
+                not hasattr(os, 'sendfile')
+        ):
+            async for data in body:
+                self._buffer(data)
+                await self._drain_buffer()
+            return
+        self._flush()
+        with open(body.file_path, 'rb') as file_:
+            if hasattr(self.loop, 'sendfile'):  # Python 3.7+ asyncio
+                try:
+                    await self.loop.sendfile(  # type: ignore
+                        self._transport, file_, body.begin, len(body),
+                    )
+                except SENDFILE_UNAVAILABLE_ERRORS:
+                    pass  # E.g. uvloop, which does not implement it
+                else:
+                    return
+            low_water_mark, high_water_mark = self._transport.get_write_buffer_limits()  # type: ignore  # noqa: E501
+            # Pause writing until the transport's buffer is empty
+            self._transport.set_write_buffer_limits(high=0)  # type: ignore
+            try:
+                offset = body.begin
+                while offset < body.end:
+                    await self.drain()
+                    if self._transport.is_closing():
+                        return
+                    try:
+                        sent = os.sendfile(
+                            socket_.fileno(), file_.fileno(), offset, body.end - offset,
+                        )
+                    except BlockingIOError:
+                        data = os.pread(
+                            file_.fileno(), min(body.buffer_size, body.end - offset), offset,
+                        )
+                        sent = len(data)
+                        self.send(data)
+                    else:
+                        self._timer_wheel.refresh(self)
+                    if sent == 0:
+                        break  # The file has been truncated
+                    offset += sent
+            finally:
+                self._transport.set_write_buffer_limits(  # type: ignore
+                    high=high_water_mark, low=low_water_mark,
+                )
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._write_buffer_size:
+            data = b''.join(self._write_buffer)
+            self._write_buffer = []
+            self._write_buffer_size = 0
+            self.send(data)
+        else:
+            self._write_buffer = []
+
     def close(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._write_buffer = []
+        self._write_buffer_size = 0
         for stream in self.streams.values():
             stream.task.cancel()
         self._transport.close()
-        self._timeout_handle.cancel()
+        self._timer_wheel.cancel(self)
+        self._can_write.set()
 
     def _after_request(self, stream_id: int, future: asyncio.Future) -> None:
         del self.streams[stream_id]
         if not self.streams:
-            self._timeout_handle = self.loop.call_later(self._timeout, self._handle_timeout)
+            self._timer_wheel.schedule(self, self._timeout)
         try:
             exception = future.exception()
         except Exception as error:
@@ -124,10 +294,7 @@ class HTTPProtocol:
             self.logger.error('Request handling exception', exc_info=exception)
 
     def response_headers(self) -> List[Tuple[str, str]]:
-        return [
-            ('date', formatdate(time(), usegmt=True)), ('server', f"quart-{self.protocol}"),
-        ]
+        return [_date_header.get(), self._server_header]
 
     def _handle_timeout(self) -> None:
-        if time() - self._last_activity > self._timeout:
-            self.close()
+        self.close()
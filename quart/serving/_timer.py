@@ -0,0 +1,105 @@
+import asyncio
+from math import ceil
+from typing import List, Optional, Set  # noqa: F401
+
+DEFAULT_WHEEL_SIZE = 64
+
+
+class Timed:
+    """A base for objects with a timeout scheduled on a TimerWheel.
+
+    The wheel stores its state on the object itself, such that
+    scheduling does not allocate a handle.
+    """
+
+    _timer_deadline: Optional[int] = None
+    _timer_slot: Optional[int] = None
+    _timer_ticks = 0
+
+    def _handle_timeout(self) -> None:
+        """Called by the wheel when the timeout expires."""
+        raise NotImplementedError()
+
+
+class TimerWheel:
+    """A hashed timer wheel shared by the connections of a server.
+
+    The wheel ticks once per resolution (seconds) whilst any timeouts
+    are scheduled. Each timeout is stored in the slot of the tick it
+    expires on (modulo the number of slots), and refreshing a timeout
+    only updates its deadline, with the timeout moved when its slot is
+    reached. This makes scheduling, refreshing and cancelling O(1)
+    without a loop timer handle per connection.
+    """
+
+    def __init__(
+            self, loop: asyncio.AbstractEventLoop, resolution: float=1.0,
+            size: int=DEFAULT_WHEEL_SIZE,
+    ) -> None:
+        self.loop = loop
+        self.resolution = resolution
+        self.tick = 0
+        self._count = 0
+        self._handle: Optional[asyncio.Handle] = None
+        self._slots: List[Set[Timed]] = [set() for _ in range(size)]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def schedule(self, timed: Timed, timeout: float) -> None:
+        """Schedule, or reschedule, the timeout in timeout seconds."""
+        # The current tick is partially elapsed, hence the extra tick
+        ticks = ceil(timeout / self.resolution) + 1
+        deadline = self.tick + ticks
+        if timed._timer_slot is not None and deadline < timed._timer_slot:
+            self.cancel(timed)
+        timed._timer_deadline = deadline
+        timed._timer_ticks = ticks
+        if timed._timer_slot is None:
+            self._add(timed, deadline)
+
+    def refresh(self, timed: Timed) -> None:
+        """Restart the scheduled timeout, if it is scheduled."""
+        if timed._timer_slot is not None:
+            timed._timer_deadline = self.tick + timed._timer_ticks
+
+    def cancel(self, timed: Timed) -> None:
+        if timed._timer_slot is not None:
+            self._slots[timed._timer_slot % len(self._slots)].discard(timed)
+            self._count -= 1
+        timed._timer_deadline = None
+        timed._timer_slot = None
+
+    def _add(self, timed: Timed, deadline: int) -> None:
+        timed._timer_slot = deadline
+        self._slots[deadline % len(self._slots)].add(timed)
+        self._count += 1
+        if self._handle is None:
+            self._handle = self.loop.call_later(self.resolution, self._tick)
+
+    def _tick(self) -> None:
+        self.tick += 1
+        index = self.tick % len(self._slots)
+        slot = self._slots[index]
+        if slot:
+            self._slots[index] = set()
+            self._count -= len(slot)
+            for timed in slot:
+                timed._timer_slot = None
+                deadline = timed._timer_deadline
+                if deadline is not None and deadline > self.tick:
+                    self._add(timed, deadline)
+                else:
+                    timed._timer_deadline = None
+                    try:
+                        timed._handle_timeout()
+                    except Exception as error:
+                        # The wheel must keep ticking for the other timeouts
+                        self.loop.call_exception_handler({
+                            'message': 'Exception in timeout handler',
+                            'exception': error,
+                        })
+        if self._count:
+            self._handle = self.loop.call_later(self.resolution, self._tick)
+        else:
+            self._handle = None
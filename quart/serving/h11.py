@@ -1,13 +1,15 @@
 import asyncio
+from collections import deque
 from itertools import chain
 from logging import Logger
-from typing import Dict, List, Optional, Tuple, TYPE_CHECKING, Union  # noqa: F401
+from typing import Deque, Dict, List, Optional, Tuple, TYPE_CHECKING, Union  # noqa: F401
 
 import h11
 
-from ._base import HTTPProtocol
+from ._base import decode_headers, HTTPProtocol, Stream
+from ._timer import TimerWheel
 from ..datastructures import CIMultiDict
-from ..wrappers import Request, Response  # noqa: F401
+from ..wrappers import FileBody, Request, Response  # noqa: F401
 
 if TYPE_CHECKING:
     from ..app import Quart  # noqa
@@ -29,9 +31,38 @@ class H2CProtocolRequired(WrongProtocolError):
     pass
 
 
+class H11Stream(Stream):
+    __slots__ = ('connection', 'event')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, request: Request) -> None:
+        super().__init__(loop, request)
+        self.connection: Optional[h11.Connection] = None
+        self.event: Optional[asyncio.Event] = None
+
+    def unblock(self) -> None:
+        if self.event is not None:
+            self.event.set()
+            self.event = None
+
+    async def block(self) -> None:
+        self.event = asyncio.Event()
+        await self.event.wait()
+
+
 class H11Server(HTTPProtocol):
+    """A HTTP/1.1 server using h11.
+
+    Pipelined requests are handled one at a time by default. If the
+    H11_PIPELINE_DEPTH config value is greater than 1, up to that many
+    pipelined requests are handled concurrently, with the responses
+    sent in request order. As h11 only parses a request once the
+    previous response is sent, each pipelined request is parsed by a
+    new h11 connection given the data received after the previous
+    request.
+    """
 
     protocol = 'h11'
+    stream_class = H11Stream
 
     def __init__(
             self,
@@ -43,12 +74,20 @@ class H11Server(HTTPProtocol):
             timeout: int,
             *,
             max_incomplete_size: Optional[int]=None,
+            timer_wheel: Optional[TimerWheel]=None,
     ) -> None:
-        super().__init__(app, loop, transport, logger, access_log_format, timeout)
+        super().__init__(
+            app, loop, transport, logger, access_log_format, timeout, timer_wheel=timer_wheel,
+        )
+        self._max_incomplete_size = max_incomplete_size or DEFAULT_MAX_INCOMPLETE_EVENT_SIZE
         self.connection = h11.Connection(
-            h11.SERVER,
-            max_incomplete_event_size=max_incomplete_size or DEFAULT_MAX_INCOMPLETE_EVENT_SIZE,
+            h11.SERVER, max_incomplete_event_size=self._max_incomplete_size,
         )
+        self._next_stream_id = 0
+        self._pipeline: Deque[int] = deque()  # Stream ids in request order
+        self._error_after_pipeline = False
+        # The stream id of the request whose body is being received
+        self._receiving: Optional[int] = None
 
     def data_received(self, data: bytes) -> None:
         super().data_received(data)
@@ -59,44 +98,100 @@ class H11Server(HTTPProtocol):
         self.connection.receive_data(b'')
         return True
 
-    def _handle_events(self) -> None:
-        while True:
-            if self.connection.they_are_waiting_for_100_continue:
+    def _handle_events(self, upgradable: bool=True) -> None:
+        while not self._error_after_pipeline:
+            if self.connection.they_are_waiting_for_100_continue and self._is_responding():
                 self._send(
                     h11.InformationalResponse(status_code=100, headers=self.response_headers()),
                 )
             try:
                 event = self.connection.next_event()
             except h11.RemoteProtocolError:
-                self._handle_error()
-                self.close()
+                self._handle_protocol_error()
                 break
             else:
                 if isinstance(event, h11.Request):
-                    headers = CIMultiDict()
+                    headers = decode_headers(event.headers)
                     if event.http_version < b'1.1':
                         headers.setdefault('host', self.app.config['SERVER_NAME'] or '')
-                    for name, value in event.headers:
-                        headers.add(name.decode().title(), value.decode())
                     if 'Upgrade' in headers:
-                        self._handle_upgrade_request(headers, event)
+                        if self._pipeline or not upgradable:
+                            # Cannot switch protocol outside of data_received
+                            self._error_after_pipeline = True
+                        else:
+                            self._handle_upgrade_request(headers, event)
                         break
+                    stream_id = self._next_stream_id
+                    self._next_stream_id += 1
                     self.handle_request(
-                        0, event.method.decode().upper(), event.target.decode(), headers,
+                        stream_id, event.method.decode().upper(), event.target.decode(), headers,
                     )
-                elif isinstance(event, h11.EndOfMessage):
-                    self.streams[0].complete()
-                elif isinstance(event, h11.Data):
-                    self.streams[0].append(event.data)
+                    self.streams[stream_id].connection = self.connection  # type: ignore
+                    self._pipeline.append(stream_id)
+                    self._receiving = stream_id
+                elif isinstance(event, (h11.Data, h11.EndOfMessage)):
+                    # The stream is gone if the request has been answered
+                    # without reading the body, which is then dropped.
+                    stream = self.streams.get(self._receiving)
+                    if isinstance(event, h11.EndOfMessage):
+                        self._receiving = None
+                        if stream is not None:
+                            stream.complete()
+                    elif stream is not None:
+                        stream.append(event.data)
+                elif event is h11.PAUSED and self._start_next_cycle():
+                    continue
                 elif event is h11.NEED_DATA or event is h11.PAUSED:
                     break
                 elif isinstance(event, h11.ConnectionClosed):
                     break
-        if self.connection.our_state is h11.MUST_CLOSE:
+        if self._error_after_pipeline and not self._pipeline:
+            self._handle_error()
+            self.close()
+        elif self.connection.our_state is h11.MUST_CLOSE:
             self.close()
 
+    def _is_responding(self) -> bool:
+        """Return True if the request being received is next to be responded to."""
+        if not self._pipeline:
+            return True
+        return self.streams[self._pipeline[0]].connection is self.connection  # type: ignore
+
+    def _start_next_cycle(self) -> bool:
+        """Start receiving the next request, returning True if started."""
+        if self.connection.their_state is not h11.DONE:
+            return False
+        elif self.connection.our_state is h11.DONE and not self._pipeline:
+            self.connection.start_next_cycle()
+            return True
+        elif (
+                self.connection.our_state is h11.SEND_RESPONSE and
+                len(self._pipeline) < self.app.config['H11_PIPELINE_DEPTH']
+        ):
+            # Parse the next request whilst this one is responded to
+            data, closed = self.connection.trailing_data
+            self.connection = h11.Connection(
+                h11.SERVER, max_incomplete_event_size=self._max_incomplete_size,
+            )
+            self.connection.receive_data(data)
+            if closed:
+                self.connection.receive_data(b'')
+            return True
+        else:
+            return False
+
+    def _handle_protocol_error(self) -> None:
+        if self._is_responding():
+            self._handle_error()
+            self.close()
+        elif self._receiving is not None:
+            self.close()  # The request being received cannot complete
+        else:
+            # Respond with an error after the pipelined responses
+            self._error_after_pipeline = True
+
     def _handle_upgrade_request(self, headers: CIMultiDict, event: h11.Request) -> None:
-        self._timeout_handle.cancel()
+        self._timer_wheel.cancel(self)
         connection_tokens = headers.get('connection', '').lower().split(',')
         if (
                 any(token == 'upgrade' for token in connection_tokens) and
@@ -113,20 +208,56 @@ class H11Server(HTTPProtocol):
             self.close()
 
     def _after_request(self, stream_id: int, future: asyncio.Future) -> None:
+        connection = self.streams[stream_id].connection  # type: ignore
         super()._after_request(stream_id, future)
-        if self.connection.our_state is h11.DONE:
-            self.connection.start_next_cycle()
-        self._handle_events()
+        if self._pipeline[0] != stream_id or connection.our_state not in {h11.DONE, h11.MUST_CLOSE}:
+            # The response was not sent, so later responses cannot be
+            self.close()
+            return
+        self._pipeline.popleft()
+        if connection.our_state is h11.MUST_CLOSE:
+            self.close()
+            return
+        elif self._pipeline:
+            self.streams[self._pipeline[0]].unblock()  # type: ignore
+        elif self._error_after_pipeline:
+            self._handle_error()
+            self.close()
+            return
+        if connection is self.connection:
+            # The remaining body, if any, must be received to continue
+            self._resume_receiving(stream_id)
+        self._handle_events(upgradable=False)
 
     async def send_response(self, stream_id: int, response: Response, suppress_body: bool) -> None:
+        stream = self.streams[stream_id]
+        if self._pipeline[0] != stream_id:
+            # Wait for the earlier responses to be sent
+            await stream.block()  # type: ignore
+        connection = stream.connection  # type: ignore
         headers = chain(
-            ((key, value) for key, value in response.headers.items()), self.response_headers(),
+            response.headers.items(), self.response_headers(),
         )
-        self._send(h11.Response(status_code=response.status_code, headers=headers))
-        if not suppress_body:
+        self._buffer(connection.send(  # type: ignore
+            h11.Response(status_code=response.status_code, headers=headers),
+        ))
+        if suppress_body:
+            pass
+        elif isinstance(response.response, FileBody):
+            # The file is passed through h11, as only its length is needed
+            for data in connection.send_with_data_passthrough(  # type: ignore
+                    h11.Data(data=response.response),
+            ):
+                if data is response.response:
+                    await self._send_file_body(data)
+                else:
+                    self._buffer(data)
+        else:
             async for data in response.response:
-                self._send(h11.Data(data=data))
-        self._send(h11.EndOfMessage())
+                self._buffer(connection.send(h11.Data(data=data)))  # type: ignore
+                await self._drain_buffer()
+        self._buffer(connection.send(h11.EndOfMessage()))  # type: ignore
+        self._flush()
 
     def _handle_error(self) -> None:
         self._send(h11.Response(
@@ -139,4 +270,5 @@ class H11Server(HTTPProtocol):
     def _send(
             self, event: Union[h11.Data, h11.EndOfMessage, h11.InformationalResponse, h11.Response],
     ) -> None:
-        self.send(self.connection.send(event))  # type: ignore
+        self._buffer(self.connection.send(event))  # type: ignore
+        self._flush()
@@ -1,4 +1,5 @@
 import asyncio
+from collections import OrderedDict
 from logging import Logger
 from typing import Dict, List, Optional, Tuple, TYPE_CHECKING, Union  # noqa: F401
 
@@ -6,8 +7,11 @@ import h2.config
 import h2.connection
 import h2.events
 import h2.exceptions
+import h2.settings
+import priority
 
-from ._base import HTTPProtocol, Stream
+from ._base import decode_headers, HTTPProtocol, MAX_WRITE_BUFFER_SIZE, Stream
+from ._timer import TimerWheel
 from ..datastructures import CIMultiDict
 from ..wrappers import Request, Response  # noqa: F401
 
@@ -15,13 +19,20 @@ if TYPE_CHECKING:
     import h11  # noqa
     from ..app import Quart  # noqa
 
+DEFAULT_HEADER_TABLE_SIZE = 4096
+DEFAULT_WINDOW_SIZE = 65535
+
 
 class H2Stream(Stream):
-    __slots__ = ('event')
+    __slots__ = ('data', 'event', 'paused', 'unacknowledged', 'waiting')
 
     def __init__(self, loop: asyncio.AbstractEventLoop, request: Request) -> None:
         super().__init__(loop, request)
+        self.data = memoryview(b'')  # Response data queued to be sent
         self.event: Optional[asyncio.Event] = None
+        self.paused = False
+        self.unacknowledged = 0
+        self.waiting = False  # Given a loop iteration to queue more data
 
     def unblock(self) -> None:
         if self.event is not None:
@@ -34,6 +45,31 @@ class H2Stream(Stream):
 
 
 class H2Server(HTTPProtocol):
+    """A HTTP/2 server using h2.
+
+    The receive windows are set by the H2_INITIAL_WINDOW_SIZE (per
+    stream) and H2_CONNECTION_WINDOW_SIZE (shared by all streams)
+    config values. Received data is acknowledged, reopening the
+    windows, as it is received unless the stream's body is above its
+    high water mark. In which case only the connection window is
+    reopened, with the stream window reopened once the view consumes
+    the body. The H2_HEADER_TABLE_SIZE, H2_MAX_CONCURRENT_STREAMS and
+    H2_MAX_FRAME_SIZE config values set the other settings.
+
+    Response data is queued by each stream and sent by a scheduler,
+    which sends a frame at a time from the streams in the priority
+    order given by the client, as the flow control windows allow.
+    Each scheduling round is sent in a single write. A stream that has
+    sent its queued data is given a loop iteration to queue more, or
+    end, before its dependents are scheduled in its place. The tree
+    also holds placeholder streams, given priority information before
+    (or after) their request, the oldest of which are evicted to make
+    room for streams with responses.
+
+    The protocol's output is buffered and sent in a single write per
+    call to data_received, or per loop iteration for the output of
+    the stream tasks.
+    """
 
     protocol = 'h2'
     stream_class = H2Stream
@@ -48,22 +84,55 @@ class H2Server(HTTPProtocol):
             timeout: int,
             *,
             upgrade_request: Optional['h11.Request']=None,
+            timer_wheel: Optional[TimerWheel]=None,
     ) -> None:
-        super().__init__(app, loop, transport, logger, access_log_format, timeout)
+        super().__init__(
+            app, loop, transport, logger, access_log_format, timeout, timer_wheel=timer_wheel,
+        )
         self.connection = h2.connection.H2Connection(
             config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8'),
         )
+        # Room for the concurrent streams, as well as the pushed and
+        # placeholder streams (1000, as priority's default, by default)
+        self.priority = priority.PriorityTree(
+            maximum_streams=10 * app.config['H2_MAX_CONCURRENT_STREAMS'],
+        )
+        self._placeholders: 'OrderedDict[int, None]' = OrderedDict()
+        self._send_handle: Optional[asyncio.Handle] = None
+        self.connection.local_settings = h2.settings.Settings(
+            client=False, initial_values={
+                h2.settings.SettingCodes.HEADER_TABLE_SIZE: app.config['H2_HEADER_TABLE_SIZE'],
+                h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: app.config['H2_INITIAL_WINDOW_SIZE'],
+                h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: app.config[
+                    'H2_MAX_CONCURRENT_STREAMS'
+                ],
+                h2.settings.SettingCodes.MAX_FRAME_SIZE: app.config['H2_MAX_FRAME_SIZE'],
+                h2.settings.SettingCodes.MAX_HEADER_LIST_SIZE: (
+                    self.connection.DEFAULT_MAX_HEADER_LIST_SIZE
+                ),
+            },
+        )
+        # Initial values are not acknowledged as changes, so h2 must be
+        # told directly. The client may use the default table size
+        # until it receives the settings.
+        self.connection.max_inbound_frame_size = app.config['H2_MAX_FRAME_SIZE']
+        self.connection.decoder.max_allowed_table_size = max(
+            app.config['H2_HEADER_TABLE_SIZE'], DEFAULT_HEADER_TABLE_SIZE,
+        )
         if upgrade_request is None:
             self.connection.initiate_connection()
         else:
-            headers = CIMultiDict()
-            for name, value in upgrade_request.headers:
-                headers.add(name.decode().title(), value.decode())
+            headers = decode_headers(upgrade_request.headers)
             self.connection.initiate_upgrade_connection(headers.get('HTTP2-Settings', ''))
             self.handle_request(
                 1, upgrade_request.method.decode().upper(), upgrade_request.target.decode(),
                 headers,
             )
+            self.streams[1].complete()  # Any body is not received over HTTP/2
+        # The connection window always starts at the default size
+        window_increment = app.config['H2_CONNECTION_WINDOW_SIZE'] - DEFAULT_WINDOW_SIZE
+        if window_increment > 0:
+            self.connection.increment_flow_control_window(window_increment)
         self.send(self.connection.data_to_send())  # type: ignore
 
     def data_received(self, data: bytes) -> None:
@@ -71,48 +140,81 @@ class H2Server(HTTPProtocol):
         try:
             events = self.connection.receive_data(data)
         except h2.exceptions.ProtocolError:
-            self.send(self.connection.data_to_send())  # type: ignore
+            self._buffer(self.connection.data_to_send())  # type: ignore
+            self._flush()
             self.close()
         else:
-            self._handle_events(events)
-            self.send(self.connection.data_to_send())  # type: ignore
+            terminated = self._handle_events(events)
+            # The output of all the events is sent in a single write
+            self._buffer(self.connection.data_to_send())  # type: ignore
+            self._flush()
+            if terminated:
+                self.close()
 
-    def _handle_events(self, events: List[h2.events.Event]) -> None:
+    def _handle_events(self, events: List[h2.events.Event]) -> bool:
+        """Handle the events, returning True if the connection is terminated."""
         for event in events:
             if isinstance(event, h2.events.RequestReceived):
-                headers = CIMultiDict()
-                for name, value in event.headers:
-                    headers.add(name.title(), value)
+                if event.priority_updated is not None:
+                    self._priority_updated(event.priority_updated)
+                # Decoded by h2, and kept with the names as received
+                headers = CIMultiDict(event.headers)
                 self.handle_request(
                     event.stream_id, headers[':method'].upper(), headers[':path'], headers,
                 )
             elif isinstance(event, h2.events.DataReceived):
-                self.streams[event.stream_id].append(event.data)
+                stream = self.streams.get(event.stream_id)
+                if stream is not None:
+                    stream.append(event.data)
+                # Whilst paused the stream's flow control window is not
+                # reopened, so the client cannot send more than the
+                # window. The connection window is, so that the other
+                # streams are not starved.
+                if stream is not None and stream.paused:  # type: ignore
+                    stream.unacknowledged += event.flow_controlled_length  # type: ignore
+                    if event.flow_controlled_length:
+                        self.connection.increment_flow_control_window(
+                            event.flow_controlled_length,
+                        )
+                else:
+                    self.connection.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id,
+                    )
             elif isinstance(event, h2.events.StreamReset):
                 self.streams[event.stream_id].task.cancel()
             elif isinstance(event, h2.events.StreamEnded):
                 self.streams[event.stream_id].complete()
             elif isinstance(event, h2.events.WindowUpdated):
                 self._window_updated(event.stream_id)
+            elif isinstance(event, h2.events.PriorityUpdated):
+                self._priority_updated(event)
             elif isinstance(event, h2.events.ConnectionTerminated):
-                self.close()
-                return
+                return True
+        return False
 
-            self.send(self.connection.data_to_send())  # type: ignore
+    def resume_writing(self) -> None:
+        super().resume_writing()
+        self._schedule_send()
 
     async def send_response(self, stream_id: int, response: Response, suppress_body: bool) -> None:
+        try:
+            self._insert_priority(stream_id)
+        except priority.DuplicateStreamError:
+            # Inserted by the client's priority information
+            self._placeholders.pop(stream_id, None)
+        self.priority.block(stream_id)  # Until it has data to send
         headers = [(':status', str(response.status_code))]
-        headers.extend([(key, value) for key, value in response.headers.items()])
+        headers.extend(response.headers.items())
         headers.extend(self.response_headers())
         self.connection.send_headers(stream_id, headers)
         for push_promise in response.push_promises:
             self._server_push(stream_id, push_promise)
-        self.send(self.connection.data_to_send())  # type: ignore
+        self._buffer(self.connection.data_to_send())  # type: ignore
         if not suppress_body:
             async for data in response.response:
                 await self._send_data(stream_id, data)
         self.connection.end_stream(stream_id)
-        self.send(self.connection.data_to_send())  # type: ignore
+        self._buffer(self.connection.data_to_send())  # type: ignore
 
     def _server_push(self, stream_id: int, path: str) -> None:
         push_stream_id = self.connection.get_next_available_stream_id()
@@ -129,25 +231,160 @@ class H2Server(HTTPProtocol):
         except h2.exceptions.ProtocolError:
             pass  # Client does not accept push promises
         else:
+            # Pushed streams depend on their associated stream
+            self._insert_priority(push_stream_id, depends_on=stream_id)
             self.handle_request(push_stream_id, 'GET', path, CIMultiDict(request_headers))
 
     async def _send_data(self, stream_id: int, data: bytes) -> None:
-        while True:
-            while not self.connection.local_flow_control_window(stream_id):
-                await self.streams[stream_id].block()  # type: ignore
-
-            chunk_size = min(len(data), self.connection.local_flow_control_window(stream_id))
-            chunk_size = min(chunk_size, self.connection.max_outbound_frame_size)
-            self.connection.send_data(stream_id, data[:chunk_size])
-            self.send(self.connection.data_to_send())  # type: ignore
-            data = data[chunk_size:]
-            if not data:
-                break
+        """Queue the data to be sent and wait until it is sent."""
+        if not data:
+            return
+        stream = self.streams[stream_id]
+        stream.data = memoryview(data)  # type: ignore # Sliced without copying
+        stream.waiting = False  # type: ignore
+        self.priority.unblock(stream_id)
+        self._schedule_send()
+        await stream.block()  # type: ignore
+
+    def _schedule_send(self) -> None:
+        if self._send_handle is None:
+            self._send_handle = self.loop.call_soon(self._send_round)
 
-    def _window_updated(self, stream_id: Optional[int]) -> None:
-        if stream_id:
-            self.streams[stream_id].unblock()  # type: ignore
-        elif stream_id is None:
-            # Unblock all streams
-            for stream in self.streams.values():
+    def _send_round(self) -> None:
+        """Send frames from the streams in priority order.
+
+        Streams are blocked in the priority tree whilst they have no
+        queued data or no flow control window, and the round ends once
+        all are blocked or enough has been sent for a single write. The
+        frames are buffered as serialized, rather than accumulated by
+        h2, and flushed together at the end of the round.
+        """
+        self._send_handle = None
+        sent = 0
+        while self._can_write.is_set():
+            if sent >= MAX_WRITE_BUFFER_SIZE:
+                self._schedule_send()
+                break
+            try:
+                stream_id = next(self.priority)
+            except priority.DeadlockError:
+                break  # No stream can send
+            stream = self.streams.get(stream_id)
+            if stream is None or not stream.data:  # type: ignore
+                if stream is not None and not stream.waiting:  # type: ignore
+                    # Allow the stream to queue more data or end first
+                    stream.waiting = True  # type: ignore
+                    self._schedule_send()
+                    break
+                self.priority.block(stream_id)
+                continue
+            try:
+                chunk_size = min(
+                    len(stream.data),  # type: ignore
+                    self.connection.local_flow_control_window(stream_id),
+                    self.connection.max_outbound_frame_size,
+                )
+                if chunk_size > 0:
+                    self.connection.send_data(stream_id, stream.data[:chunk_size])  # type: ignore
+                    self._buffer(self.connection.data_to_send())  # type: ignore
+            except h2.exceptions.StreamClosedError:
+                # Reset by the client, the stream's task is cancelled
+                stream.data = memoryview(b'')  # type: ignore
+                self.priority.block(stream_id)
+                continue
+            if chunk_size > 0:
+                stream.data = stream.data[chunk_size:]  # type: ignore
+                sent += chunk_size
+            if not stream.data:  # type: ignore
                 stream.unblock()  # type: ignore
+            elif chunk_size <= 0:
+                self.priority.block(stream_id)  # Until the window is updated
+        self._buffer(self.connection.data_to_send())  # type: ignore
+        self._flush()
+
+    def _pause_receiving(self, stream_id: int) -> None:
+        self.streams[stream_id].paused = True  # type: ignore
+
+    def _resume_receiving(self, stream_id: int) -> None:
+        stream = self.streams[stream_id]
+        stream.paused = False  # type: ignore
+        if stream.unacknowledged:  # type: ignore
+            # The connection window was reopened as the data was received
+            try:
+                self.connection.increment_flow_control_window(
+                    stream.unacknowledged, stream_id,  # type: ignore
+                )
+            except h2.exceptions.StreamClosedError:
+                pass  # The client cannot send any more data
+            stream.unacknowledged = 0  # type: ignore
+            self._buffer(self.connection.data_to_send())  # type: ignore
+
+    def _window_updated(self, stream_id: int) -> None:
+        if stream_id == 0:  # The connection window
+            stream_ids = list(self.streams.keys())
+        else:
+            stream_ids = [stream_id]
+        for stream_id in stream_ids:
+            stream = self.streams.get(stream_id)
+            if stream is not None and stream.data:  # type: ignore
+                self.priority.unblock(stream_id)
+        self._schedule_send()
+
+    def _priority_updated(self, event: h2.events.PriorityUpdated) -> None:
+        depends_on = event.depends_on or None
+        try:
+            self._track_parent(depends_on)
+            self.priority.reprioritize(
+                event.stream_id, depends_on=depends_on, weight=event.weight,
+                exclusive=event.exclusive,
+            )
+        except priority.MissingStreamError:
+            # Priority information for a stream without a response
+            try:
+                self._insert_priority(event.stream_id, depends_on, event.weight, event.exclusive)
+            except (priority.PriorityLoop, priority.TooManyStreamsError):
+                return
+            self._placeholders[event.stream_id] = None
+            self.priority.block(event.stream_id)
+        except (priority.BadWeightError, priority.PriorityLoop, priority.TooManyStreamsError):
+            pass  # Invalid priority information is ignored
+
+    def _insert_priority(
+            self, stream_id: int, depends_on: Optional[int]=None, weight: int=16,
+            exclusive: bool=False,
+    ) -> None:
+        """Insert the stream, evicting the oldest placeholders if the tree is full."""
+        self._track_parent(depends_on)
+        while True:
+            try:
+                self.priority.insert_stream(
+                    stream_id, depends_on=depends_on, weight=weight, exclusive=exclusive,
+                )
+            except priority.TooManyStreamsError:
+                if not self._placeholders:
+                    raise
+                placeholder_id, _ = self._placeholders.popitem(last=False)
+                try:
+                    self.priority.remove_stream(placeholder_id)
+                except priority.MissingStreamError:
+                    pass
+            else:
+                return
+
+    def _track_parent(self, depends_on: Optional[int]) -> None:
+        """Track the parent as a placeholder, if the tree will insert it."""
+        if depends_on is not None and depends_on not in self.streams:
+            self._placeholders.setdefault(depends_on, None)
+
+    def _after_request(self, stream_id: int, future: asyncio.Future) -> None:
+        try:
+            self.priority.remove_stream(stream_id)
+        except priority.MissingStreamError:
+            pass  # The request failed before the response was started
+        super()._after_request(stream_id, future)
+
+    def close(self) -> None:
+        if self._send_handle is not None:
+            self._send_handle.cancel()
+            self._send_handle = None
+        super().close()
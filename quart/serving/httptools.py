@@ -0,0 +1,324 @@
+import asyncio
+from collections import deque
+from http import HTTPStatus
+from logging import Logger
+from typing import Deque, List, Optional, Tuple, TYPE_CHECKING  # noqa: F401
+
+import h11
+
+from ._base import decode_headers, HTTPProtocol, Stream
+from ._timer import TimerWheel
+from .h11 import DEFAULT_MAX_INCOMPLETE_EVENT_SIZE, H2CProtocolRequired, WebsocketProtocolRequired
+from ..datastructures import CIMultiDict
+from ..wrappers import FileBody, Response
+
+try:
+    import httptools
+except ImportError:
+    httptools = None
+
+if TYPE_CHECKING:
+    from ..app import Quart  # noqa
+
+_STATUS_LINES = {
+    status.value: f"HTTP/1.1 {status.value} {status.phrase}\r\n".encode('ascii')
+    for status in HTTPStatus
+}
+
+
+class _ParsedRequest:
+    __slots__ = ('body', 'body_size', 'complete', 'finished', 'headers', 'http_version',
+                 'keep_alive', 'method', 'path', 'stream')
+
+    def __init__(
+            self, method: str, path: str, headers: CIMultiDict, http_version: str,
+            keep_alive: bool,
+    ) -> None:
+        self.body: List[bytes] = []
+        self.body_size = 0
+        self.complete = False
+        self.finished = False
+        self.headers = headers
+        self.http_version = http_version
+        self.keep_alive = keep_alive
+        self.method = method
+        self.path = path
+        self.stream: Optional[Stream] = None
+
+    def append(self, data: bytes) -> None:
+        if self.stream is not None:
+            self.stream.append(data)
+        elif not self.finished:
+            self.body.append(data)
+            self.body_size += len(data)
+
+    def set_complete(self) -> None:
+        self.complete = True
+        if self.stream is not None:
+            self.stream.complete()
+
+
+class HTTPToolsServer(HTTPProtocol):
+    """A HTTP/1.1 server using the httptools (C) parser.
+
+    This serves HTTP/1.1 as the :class:`~quart.serving.h11.H11Server`
+    does, but parses requests with httptools. Pipelined requests are
+    parsed as received, but handled one at a time in order. The body
+    of a request waiting to be handled is buffered up to the
+    BODY_HIGH_WATER_MARK, beyond which reading is paused.
+    """
+
+    protocol = 'h11'
+
+    def __init__(
+            self,
+            app: 'Quart',
+            loop: asyncio.AbstractEventLoop,
+            transport: asyncio.BaseTransport,
+            logger: Optional[Logger],
+            access_log_format: str,
+            timeout: int,
+            *,
+            max_incomplete_size: Optional[int]=None,
+            timer_wheel: Optional[TimerWheel]=None,
+    ) -> None:
+        super().__init__(
+            app, loop, transport, logger, access_log_format, timeout, timer_wheel=timer_wheel,
+        )
+        self.parser = httptools.HttpRequestParser(self)
+        self._max_incomplete_size = max_incomplete_size or DEFAULT_MAX_INCOMPLETE_EVENT_SIZE
+        self._in_head = False
+        self._incomplete_size = 0
+        self._chunk_offset = 0  # Estimated position in the data being parsed
+        self._head_offset: Optional[int] = None  # Of the head, if it began in the data
+        self._raw_headers: List[Tuple[bytes, bytes]] = []
+        self._url = b''
+        self._parsing: Optional[_ParsedRequest] = None
+        self._pipeline: Deque[_ParsedRequest] = deque()
+        self._active: Optional[_ParsedRequest] = None
+        self._upgrade_request: Optional[h11.Request] = None
+        self._closed = False
+        self._error_after_pipeline = False
+        self._parse_failed = False
+
+    def data_received(self, data: bytes) -> None:
+        super().data_received(data)
+        if self._parse_failed:
+            return
+        self._chunk_offset = 0
+        self._head_offset = None
+        try:
+            self.parser.feed_data(data)
+        except httptools.HttpParserUpgrade:
+            pass  # Handled below
+        except httptools.HttpParserError:
+            self._handle_parse_error()
+            return
+        if self._in_head:
+            # As with h11, limit the size of an incomplete request head
+            if self._head_offset is None:
+                self._incomplete_size += len(data)
+            else:
+                self._incomplete_size = len(data) - self._head_offset
+            if self._incomplete_size > self._max_incomplete_size:
+                self._handle_parse_error()
+                return
+        if self._upgrade_request is not None:
+            self._handle_upgrade_request(self._upgrade_request)
+
+    def eof_received(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._closed = True
+        super().close()
+
+    # httptools parser callbacks
+
+    def on_message_begin(self) -> None:
+        self._in_head = True
+        self._head_offset = self._chunk_offset
+        self._incomplete_size = 0
+        self._raw_headers = []
+        self._url = b''
+
+    def on_url(self, url: bytes) -> None:
+        self._url += url
+
+    def on_header(self, name: bytes, value: bytes) -> None:
+        self._raw_headers.append((name, value))
+
+    def on_headers_complete(self) -> None:
+        self._in_head = False
+        # httptools does not give the parsed position, so estimate the
+        # head size to locate the start of any next request head.
+        head_size = (
+            len(self.parser.get_method()) + len(self._url) + len(' HTTP/1.1\r\n\r\n') +
+            sum(len(name) + len(value) + len(': \r\n') for name, value in self._raw_headers)
+        )
+        if self._head_offset is None:  # Began in earlier data
+            self._chunk_offset += max(head_size - self._incomplete_size, 0)
+        else:
+            self._chunk_offset = self._head_offset + head_size
+        http_version = self.parser.get_http_version()
+        headers = decode_headers(self._raw_headers)
+        if http_version != '1.1':
+            headers.setdefault('host', self.app.config['SERVER_NAME'] or '')
+        method = self.parser.get_method().decode().upper()
+        path = self._url.decode()
+        if 'Upgrade' in headers:
+            if self._active is not None or self._pipeline:
+                # Cannot switch protocol whilst responding, as h11
+                self._error_after_pipeline = True
+                self._parse_failed = True
+                return
+            self._upgrade_request = h11.Request(
+                method=method, target=path, headers=self._raw_headers,
+                http_version=http_version,
+            )
+            return
+        self._parsing = _ParsedRequest(
+            method, path, headers, http_version, self.parser.should_keep_alive(),
+        )
+        self._pipeline.append(self._parsing)
+        self._start_next_request()
+
+    def on_body(self, data: bytes) -> None:
+        self._chunk_offset += len(data)
+        if self._parsing is not None:
+            self._parsing.append(data)
+            high_water_mark = self.app.config['BODY_HIGH_WATER_MARK']
+            if (
+                    self._parsing.stream is None and high_water_mark is not None and
+                    self._parsing.body_size >= high_water_mark
+            ):
+                # Resumed once the request is handled and its body consumed
+                self._pause_receiving(0)
+
+    def on_message_complete(self) -> None:
+        if self._parsing is not None:
+            self._parsing.set_complete()
+            self._parsing = None
+
+    def _start_next_request(self) -> None:
+        if self._active is not None or not self._pipeline:
+            return
+        request = self._active = self._pipeline.popleft()
+        if (
+                request.http_version == '1.1' and
+                request.headers.get('Expect', '').lower() == '100-continue' and
+                not request.complete
+        ):
+            self._buffer(self._serialize_head(100, self.response_headers()))
+            self._flush()
+        self.handle_request(0, request.method, request.path, request.headers)
+        request.stream = self.streams[0]
+        for data in request.body:
+            request.stream.append(data)
+        request.body = []
+        request.body_size = 0
+        if request.complete:
+            request.stream.complete()
+
+    def _after_request(self, stream_id: int, future: asyncio.Future) -> None:
+        super()._after_request(stream_id, future)
+        request, self._active = self._active, None
+        request.stream = None  # type: ignore
+        request.finished = True  # type: ignore
+        if self._closed:
+            return
+        elif not request.keep_alive:  # type: ignore
+            self.close()
+        elif self._error_after_pipeline and not self._pipeline:
+            self._handle_error()
+            self.close()
+        else:
+            # The remaining body, if any, must be received to continue
+            self._resume_receiving(stream_id)
+            self._start_next_request()
+
+    def _handle_parse_error(self) -> None:
+        self._parse_failed = True
+        if self._active is None and not self._pipeline:
+            self._handle_error()
+            self.close()
+        elif self._parsing is not None:
+            self.close()  # The request being received cannot complete
+        else:
+            # Respond with an error after the pipelined responses
+            self._error_after_pipeline = True
+
+    def _handle_upgrade_request(self, request: h11.Request) -> None:
+        self._timer_wheel.cancel(self)
+        headers = decode_headers(request.headers)
+        connection_tokens = headers.get('connection', '').lower().split(',')
+        if (
+                any(token == 'upgrade' for token in connection_tokens) and
+                headers.get('upgrade', '').lower() == 'websocket'
+        ):
+            raise WebsocketProtocolRequired(request)
+        elif headers.get('upgrade', '').lower() == 'h2c':
+            self._buffer(self._serialize_head(
+                101, [('upgrade', 'h2c')] + self.response_headers(),
+            ))
+            self._flush()
+            raise H2CProtocolRequired(request)
+        else:
+            self._handle_error()
+            self.close()
+
+    async def send_response(self, stream_id: int, response: Response, suppress_body: bool) -> None:
+        request = self._active
+        headers = list(response.headers.items())
+        headers.extend(self.response_headers())
+        chunked = False
+        if not suppress_body and 'Content-Length' not in response.headers:
+            if request.http_version == '1.1':  # type: ignore
+                chunked = True
+                headers.append(('transfer-encoding', 'chunked'))
+            else:
+                request.keep_alive = False  # type: ignore # The body is delimited by closing
+        if response.headers.get('Connection', '').lower() == 'close':
+            request.keep_alive = False  # type: ignore
+        elif not request.keep_alive:  # type: ignore
+            headers.append(('connection', 'close'))
+        self._buffer(self._serialize_head(response.status_code, headers))
+        if suppress_body:
+            pass
+        elif isinstance(response.response, FileBody):
+            if chunked and len(response.response) > 0:
+                self._buffer(b"%x\r\n" % len(response.response))
+                await self._send_file_body(response.response)
+                self._buffer(b"\r\n0\r\n\r\n")
+            elif chunked:
+                self._buffer(b"0\r\n\r\n")
+            else:
+                await self._send_file_body(response.response)
+        else:
+            async for data in response.response:
+                if chunked:
+                    if data:
+                        self._buffer(b"%x\r\n%b\r\n" % (len(data), data))
+                else:
+                    self._buffer(data)
+                await self._drain_buffer()
+            if chunked:
+                self._buffer(b"0\r\n\r\n")
+        self._flush()
+
+    def _handle_error(self) -> None:
+        self._buffer(self._serialize_head(
+            400, [('content-length', '0'), ('connection', 'close')] + self.response_headers(),
+        ))
+        self._flush()
+
+    @staticmethod
+    def _serialize_head(status_code: int, headers: List[Tuple[str, str]]) -> bytes:
+        lines = ''.join(f"{name}: {value}\r\n" for name, value in headers)
+        # Only the line endings added above may be present
+        if lines.count('\r') != len(headers) or lines.count('\n') != len(headers):
+            raise ValueError('Invalid characters in the response headers')
+        status_line = _STATUS_LINES.get(status_code)
+        if status_line is None:
+            status_line = f"HTTP/1.1 {status_code} \r\n".encode('ascii')
+        return status_line + lines.encode('latin-1') + b'\r\n'
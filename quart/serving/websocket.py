@@ -6,7 +6,7 @@ import wsproto.connection
 import wsproto.events
 import wsproto.extensions
 
-from ..datastructures import CIMultiDict
+from ._base import decode_headers
 from ..exceptions import BadRequest, HTTPException, MethodNotAllowed, NotFound, RedirectRequired
 from ..wrappers import Websocket
 
@@ -61,14 +61,18 @@ class WebsocketServer:
     def connection_lost(self, exception: Exception) -> None:
         pass
 
+    def pause_writing(self) -> None:
+        pass
+
+    def resume_writing(self) -> None:
+        pass
+
     def close(self) -> None:
         self.task.cancel()
         self._transport.close()
 
     def handle_websocket(self, event: wsproto.events.ConnectionRequested) -> None:
-        headers = CIMultiDict()
-        for name, value in event.h11request.headers:
-            headers.add(name.decode().title(), value.decode())
+        headers = decode_headers(event.h11request.headers)
         scheme = 'wss' if self._transport.get_extra_info('ssl_object') is not None else 'ws'
         websocket = Websocket(
             event.h11request.target.decode(), scheme, headers, self.queue, self.send_data,
@@ -1,19 +1,37 @@
+import asyncio
 import mimetypes
 import os
 import pkgutil
+import posixpath
+import re
 import sys
+from collections import OrderedDict
+from copy import copy
+from datetime import timezone
+from email.utils import formatdate
+from hashlib import sha256
 from pathlib import Path
-from typing import AnyStr, Optional
+from stat import S_ISREG
+from time import monotonic
+from typing import AnyStr, AsyncGenerator, Dict, List, Optional, Tuple, Union
 from typing.io import IO
+from uuid import uuid4
 
 from aiofiles import open as async_open
 from jinja2 import FileSystemLoader
 
-from .exceptions import NotFound
-from .globals import current_app
-from .wrappers import Response
+from .ctx import has_request_context
+from .exceptions import NotFound, RequestRangeNotSatisfiable
+from .globals import current_app, request
+from .wrappers import FileBody, Response
 
 DEFAULT_MIMETYPE = 'application/octet-stream'
+# The precompressed file suffixes by encoding, in order of preference
+PRECOMPRESSED_SUFFIXES = OrderedDict([('br', '.br'), ('gzip', '.gz')])
+FINGERPRINT_LENGTH = 12
+# Range requests with more ranges are answered with the whole file
+MAX_RANGES = 100
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
 
 
 class PackageStatic:
@@ -31,6 +49,8 @@ class PackageStatic:
 
         self._static_folder: Optional[str] = None
         self._static_url_path: Optional[str] = None
+        self._static_cache: Optional[StaticCache] = None
+        self._static_fingerprints: Optional[StaticFingerprints] = None
 
     @property
     def static_folder(self) -> Optional[str]:
@@ -69,10 +89,53 @@ class PackageStatic:
         else:
             return None
 
+    def static_fingerprint(self, filename: str) -> str:
+        """Return the fingerprinted name of the file in the static folder.
+
+        See :class:`StaticFingerprints`, this is used to build static
+        urls if ``STATIC_FINGERPRINT`` is configured.
+        """
+        return self._get_static_fingerprints().fingerprint(filename)
+
     async def send_static_file(self, filename: str) -> Response:
+        """Send a file from the static folder.
+
+        If the ``STATIC_CACHE_MAX_SIZE`` is configured (non zero) the
+        files are served from a :class:`StaticCache`. If
+        ``STATIC_FINGERPRINT`` is configured a fingerprinted filename,
+        matching the file's current contents, is sent with headers to
+        cache it indefinitely.
+        """
         if not self.has_static_folder:
             raise RuntimeError('No static folder for this object')
-        return await send_from_directory(self.static_folder, filename)
+        config = current_app.config
+        fingerprint: Optional[str] = None
+        if config['STATIC_FINGERPRINT']:
+            original = await self._get_static_fingerprints().original(filename)
+            if original is not None:
+                filename, fingerprint = original
+        if config['STATIC_CACHE_MAX_SIZE'] > 0:
+            if self._static_cache is None:
+                self._static_cache = StaticCache(
+                    config['STATIC_CACHE_MAX_SIZE'], config['STATIC_CACHE_MAX_FILE_SIZE'],
+                    config['STATIC_CACHE_REVALIDATE_INTERVAL'],
+                )
+            return await self._static_cache.send_from_directory(  # type: ignore
+                self.static_folder, filename, fingerprint=fingerprint,
+            )
+        return await _send_from_directory(  # type: ignore
+            self.static_folder, filename, fingerprint,
+        )
+
+    def _get_static_fingerprints(self) -> 'StaticFingerprints':
+        if (
+                self._static_fingerprints is None or
+                self._static_fingerprints.directory != self.static_folder
+        ):
+            self._static_fingerprints = StaticFingerprints(  # type: ignore
+                self.static_folder, current_app.config['STATIC_CACHE_REVALIDATE_INTERVAL'],
+            )
+        return self._static_fingerprints
 
     def open_resource(self, path: str, mode: str='rb') -> IO[AnyStr]:
         """Open a file for reading.
@@ -119,14 +182,472 @@ def safe_join(directory: str, *paths: str) -> Path:
 
 
 async def send_from_directory(directory: str, file_name: str) -> Response:
+    """Return a response to send the named file from the directory.
+
+    If ``STATIC_PRECOMPRESSED`` is configured a precompressed sibling
+    of the file, i.e. ``file_name.br`` or ``file_name.gz``, is sent
+    instead if the request accepts the encoding.
+    """
+    return await _send_from_directory(directory, file_name)
+
+
+async def _send_from_directory(
+        directory: str, file_name: str, fingerprint: Optional[str]=None,
+) -> Response:
     file_path = safe_join(directory, file_name)
     if not os.path.isfile(file_path):
         raise NotFound()
-    return await send_file(file_path)  # type: ignore
+    variants = _precompressed_variants(file_path)
+    encoding = _select_encoding(variants)
+    if encoding is None:
+        file_body = FileBody(file_path)
+    else:
+        file_body = FileBody(variants[encoding])
+    return _file_response(
+        file_body, _guess_mimetype(file_path.name), file_body.mtime, encoding=encoding,
+        vary=bool(variants), fingerprint=fingerprint,
+    )
 
 
 async def send_file(filename: str) -> Response:
-    mimetype = mimetypes.guess_type(os.path.basename(filename))[0] or DEFAULT_MIMETYPE
-    async with async_open(filename, mode='rb') as file_:
-        data = await file_.read()
-    return current_app.response_class(data, mimetype=mimetype)
+    """Return a response to send the file.
+
+    The file is not read into memory, rather it is sent as the
+    response is, see :class:`~quart.wrappers.FileBody`. If there is a
+    request the conditional (If-None-Match, If-Modified-Since) and
+    Range (with If-Range) headers are respected, responding 304 Not
+    Modified, 206 Partial Content, or 416 Range Not Satisfiable as
+    appropriate. Only the requested ranges of the file are read.
+    """
+    file_body = FileBody(filename)
+    return _file_response(file_body, _guess_mimetype(os.path.basename(filename)), file_body.mtime)
+
+
+class _Fingerprint:
+
+    def __init__(
+            self, filename: str, digest: str, file_path: Path, mtime: float, size: int,
+    ) -> None:
+        stem, suffix = posixpath.splitext(filename)
+        self.filename = filename
+        self.fingerprinted = f"{stem}.{digest[:FINGERPRINT_LENGTH]}{suffix}"
+        self.digest = digest
+        self.file_path = file_path
+        self.mtime = mtime
+        self.size = size
+        self.checked = monotonic()
+
+
+class StaticFingerprints:
+    """The content hash fingerprinted names of the files in a directory.
+
+    A fingerprinted name includes a hash of the file's contents before
+    the extension, for example ``app.3f9a1c2b4d5e.js`` for ``app.js``.
+    As the name changes whenever the contents do, clients can cache
+    the file indefinitely.
+
+    Files are hashed in a thread, rather than whilst building a url, so
+    a file's name is not fingerprinted until it has been hashed. The
+    modification time and size of a hashed file are checked at most
+    every ``revalidate_interval`` seconds, and if either has changed
+    the file is hashed again and its previous fingerprinted name is no
+    longer found.
+
+    Arguments:
+        directory: The directory containing the files.
+        revalidate_interval: The minimum number of seconds between
+            checks that a hashed file is unchanged.
+    """
+
+    _fingerprint_re = re.compile(
+        r'^(?P<stem>.+)\.(?P<fingerprint>[0-9a-f]{%d})(?P<suffix>\.[^./]+)?$' % FINGERPRINT_LENGTH,
+    )
+
+    def __init__(self, directory: str, revalidate_interval: float) -> None:
+        self.directory = directory
+        self.revalidate_interval = revalidate_interval
+        self._fingerprints: Dict[str, _Fingerprint] = {}  # By filename
+        self._originals: Dict[str, _Fingerprint] = {}  # By fingerprinted name
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    def fingerprint(self, filename: str) -> str:
+        """Return the fingerprinted name, or the name if not yet hashed.
+
+        A file that is not yet hashed, or has changed, is hashed in
+        the background.
+        """
+        fingerprint = self._fingerprints.get(filename)
+        if fingerprint is not None and self._is_fresh(fingerprint):
+            return fingerprint.fingerprinted
+        self.load(filename)
+        return filename
+
+    async def original(self, fingerprinted: str) -> Optional[Tuple[str, str]]:
+        """Return the original name and full hash of a fingerprinted name.
+
+        None is returned if the name is not a fingerprinted name of a
+        file with the same contents.
+        """
+        fingerprint = self._originals.get(fingerprinted)
+        if fingerprint is None or not self._is_fresh(fingerprint):
+            match = self._fingerprint_re.match(fingerprinted)
+            if match is None:
+                return None
+            await self.load(match.group('stem') + (match.group('suffix') or ''))
+            fingerprint = self._originals.get(fingerprinted)
+            if fingerprint is None:
+                return None
+        return fingerprint.filename, fingerprint.digest
+
+    def load(self, filename: str) -> asyncio.Future:
+        """Hash the file in a thread, returning a future of the completion."""
+        if filename not in self._loading:
+            future = asyncio.ensure_future(self._load(filename))
+            self._loading[filename] = future
+            future.add_done_callback(lambda _: self._loading.pop(filename, None))
+        return self._loading[filename]
+
+    async def _load(self, filename: str) -> None:
+        previous = self._fingerprints.pop(filename, None)
+        if previous is not None:
+            self._originals.pop(previous.fingerprinted, None)
+        try:
+            file_path = safe_join(self.directory, filename)
+            stat = os.stat(file_path)
+            digest = await asyncio.get_event_loop().run_in_executor(None, _hash_file, file_path)
+        except (NotFound, OSError):
+            return
+        fingerprint = _Fingerprint(filename, digest, file_path, stat.st_mtime, stat.st_size)
+        self._fingerprints[filename] = fingerprint
+        self._originals[fingerprint.fingerprinted] = fingerprint
+
+    def _is_fresh(self, fingerprint: _Fingerprint) -> bool:
+        now = monotonic()
+        if now - fingerprint.checked < self.revalidate_interval:
+            return True
+        try:
+            stat = os.stat(fingerprint.file_path)
+        except OSError:
+            return False
+        if stat.st_mtime != fingerprint.mtime or stat.st_size != fingerprint.size:
+            return False
+        fingerprint.checked = now
+        return True
+
+
+def _hash_file(file_path: Path) -> str:
+    digest = sha256()
+    with open(file_path, 'rb') as file_:
+        for data in iter(lambda: file_.read(64 * 1024), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class _CachedFile:
+
+    def __init__(self, file_path: Path, mimetype: str, mtime: float, data: bytes) -> None:
+        self.file_path = file_path
+        self.mimetype = mimetype
+        self.mtime = mtime
+        self.data = data
+        self.checked = monotonic()
+
+
+class StaticCache:
+    """A size bounded, least recently used, cache of static files.
+
+    Files up to the ``max_file_size`` are held in memory, along with
+    their resolved path and mimetype, so that they can be served
+    without accessing the file system. The modification time and size
+    of a cached file are checked at most every
+    ``revalidate_interval`` seconds, and if either has changed the
+    file is read again. Larger files are sent as by
+    :func:`send_from_directory`. Precompressed siblings, if configured,
+    are cached alongside the file. The ``fingerprint``, if given, is
+    the content hash of a fingerprinted file, see
+    :class:`StaticFingerprints`.
+
+    Arguments:
+        max_size: The maximum total size, in bytes, of the cached files.
+        max_file_size: The maximum size of a file to cache.
+        revalidate_interval: The minimum number of seconds between
+            checks that a cached file is unchanged.
+    """
+
+    def __init__(self, max_size: int, max_file_size: int, revalidate_interval: float) -> None:
+        self.max_size = max_size
+        self.max_file_size = min(max_file_size, max_size)
+        self.revalidate_interval = revalidate_interval
+        self.size = 0
+        self._files: 'OrderedDict[Tuple[str, str, str], _CachedFile]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    async def send_from_directory(
+            self, directory: str, file_name: str, *, fingerprint: Optional[str]=None,
+    ) -> Response:
+        key = (directory, file_name, 'identity')
+        cached = self._get(key)
+        if cached is None:
+            file_path = safe_join(directory, file_name)
+            cached = await self._load(key, file_path, _guess_mimetype(file_path.name))
+            if cached is None:  # Too large to cache
+                return await _send_from_directory(directory, file_name, fingerprint)
+
+        variants = _precompressed_variants(cached.file_path)
+        encoding = _select_encoding(variants)
+        if encoding is not None:
+            key = (directory, file_name, encoding)
+            encoded = self._get(key)
+            if encoded is None:
+                encoded = await self._load(key, variants[encoding], cached.mimetype)
+                if encoded is None:  # Too large to cache
+                    file_body = FileBody(variants[encoding])
+                    return _file_response(
+                        file_body, cached.mimetype, file_body.mtime, encoding=encoding,
+                        vary=True, fingerprint=fingerprint,
+                    )
+            cached = encoded
+        return _file_response(
+            cached.data, cached.mimetype, cached.mtime, encoding=encoding, vary=bool(variants),
+            fingerprint=fingerprint,
+        )
+
+    def _get(self, key: Tuple[str, str, str]) -> Optional[_CachedFile]:
+        cached = self._files.get(key)
+        if cached is not None:
+            if self._is_fresh(cached):
+                self._files.move_to_end(key)
+            else:
+                self._remove(key)
+                cached = None
+        return cached
+
+    async def _load(
+            self, key: Tuple[str, str, str], file_path: Path, mimetype: str,
+    ) -> Optional[_CachedFile]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            raise NotFound()
+        if not S_ISREG(stat.st_mode):
+            raise NotFound()
+        if stat.st_size > self.max_file_size:
+            return None
+        async with async_open(file_path, mode='rb') as file_:
+            data = await file_.read()
+        cached = _CachedFile(file_path, mimetype, stat.st_mtime, data)
+        self._add(key, cached)
+        return cached
+
+    def _is_fresh(self, cached: _CachedFile) -> bool:
+        now = monotonic()
+        if now - cached.checked < self.revalidate_interval:
+            return True
+        try:
+            stat = os.stat(cached.file_path)
+        except OSError:
+            return False
+        if stat.st_mtime != cached.mtime or stat.st_size != len(cached.data):
+            return False
+        cached.checked = now
+        return True
+
+    def _add(self, key: Tuple[str, str, str], cached: _CachedFile) -> None:
+        if key in self._files:  # Loaded by concurrent misses
+            self._remove(key)
+        self._files[key] = cached
+        self.size += len(cached.data)
+        while self.size > self.max_size:
+            _, evicted = self._files.popitem(last=False)
+            self.size -= len(evicted.data)
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        self.size -= len(self._files.pop(key).data)
+
+
+def _guess_mimetype(file_name: str) -> str:
+    return mimetypes.guess_type(file_name)[0] or DEFAULT_MIMETYPE
+
+
+_precompressed: Dict[Path, Tuple[float, Dict[str, Path]]] = {}
+
+
+def _precompressed_variants(file_path: Path) -> Dict[str, Path]:
+    """Return the precompressed siblings of the file by encoding.
+
+    The lookup is cached per path, and repeated at most every
+    ``STATIC_CACHE_REVALIDATE_INTERVAL`` seconds.
+    """
+    if not has_request_context() or not current_app.config['STATIC_PRECOMPRESSED']:
+        return {}
+    now = monotonic()
+    checked, variants = _precompressed.get(file_path, (None, None))
+    if (
+            checked is None or variants is None or
+            now - checked >= current_app.config['STATIC_CACHE_REVALIDATE_INTERVAL']
+    ):
+        variants = {}
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            variant_path = file_path.with_name(file_path.name + suffix)
+            if os.path.isfile(variant_path):
+                variants[encoding] = variant_path
+        _precompressed[file_path] = (now, variants)
+    return variants
+
+
+def _select_encoding(variants: Dict[str, Path]) -> Optional[str]:
+    """Return the best accepted encoding, or None for the identity."""
+    if not variants:
+        return None
+    encoding = request.accept_encodings.best_match(list(variants) + ['identity'], 'identity')
+    return None if encoding == 'identity' else encoding
+
+
+def _file_response(
+        body: Union[bytes, FileBody],
+        mimetype: str,
+        mtime: float,
+        *,
+        encoding: Optional[str]=None,
+        vary: bool=False,
+        fingerprint: Optional[str]=None,
+) -> Response:
+    """Return a response for the file body, honouring the request's conditions.
+
+    A fingerprinted file, with the ``fingerprint`` content hash given,
+    has the hash as its ETag and is cached by clients indefinitely.
+    """
+    size = len(body)
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'Last-Modified': formatdate(mtime, usegmt=True),
+    }
+    if fingerprint is not None:
+        etag = fingerprint
+        headers['Cache-Control'] = f"public,max-age={IMMUTABLE_MAX_AGE},immutable"
+    else:
+        etag = f"{int(mtime * 1e6):x}-{size:x}"
+    if encoding is not None:
+        etag += f"-{encoding}"
+        headers['Content-Encoding'] = encoding
+    if vary:
+        headers['Vary'] = 'Accept-Encoding'
+    headers['ETag'] = f'"{etag}"'
+    if not has_request_context():
+        return current_app.response_class(body, mimetype=mimetype, headers=headers)
+
+    if _not_modified(etag, mtime):
+        response = current_app.response_class(b'', status=304, headers=headers)
+        del response.headers['Content-Length']
+        return response
+
+    spans = _requested_spans(etag, size, mtime)
+    if spans is None:
+        return current_app.response_class(body, mimetype=mimetype, headers=headers)
+    elif not spans:
+        raise RequestRangeNotSatisfiable(size)
+    elif len(spans) == 1:
+        begin, end = spans[0]
+        headers['Content-Range'] = f"bytes {begin}-{end - 1}/{size}"
+        return current_app.response_class(
+            _slice_body(body, begin, end), status=206, mimetype=mimetype, headers=headers,
+        )
+    else:
+        boundary = uuid4().hex
+        parts = []
+        for begin, end in spans:
+            head = (
+                f"\r\n--{boundary}\r\nContent-Type: {mimetype}\r\n"
+                f"Content-Range: bytes {begin}-{end - 1}/{size}\r\n\r\n"
+            ).encode('ascii')
+            parts.append((head, _slice_body(body, begin, end)))
+        tail = f"\r\n--{boundary}--\r\n".encode('ascii')
+        response = current_app.response_class(
+            _iterate_parts(parts, tail), status=206, headers=headers,
+            content_type=f"multipart/byteranges; boundary={boundary}",
+        )
+        response.headers['Content-Length'] = str(
+            sum(len(head) + len(part) for head, part in parts) + len(tail),
+        )
+        return response
+
+
+def _not_modified(etag: str, mtime: float) -> bool:
+    if 'If-None-Match' in request.headers:  # Takes precedence over If-Modified-Since
+        return request.if_none_match.contains_weak(etag)
+    if_modified_since = request.if_modified_since
+    if if_modified_since is None:
+        return False
+    if if_modified_since.tzinfo is None:
+        if_modified_since = if_modified_since.replace(tzinfo=timezone.utc)
+    return int(mtime) <= if_modified_since.timestamp()
+
+
+def _requested_spans(etag: str, size: int, mtime: float) -> Optional[List[Tuple[int, int]]]:
+    """Return the satisfiable (begin, end) spans requested.
+
+    None is returned if the whole file should be sent instead, which
+    is the case if there is no valid Range header, the If-Range
+    condition fails, or the ranges are too many or overlap to total
+    more than the file. Overlapping and adjacent spans are merged.
+    """
+    if request.method != 'GET' or 'Range' not in request.headers:
+        return None
+    range_ = request.range
+    if range_.units != 'bytes' or not range_.ranges or len(range_.ranges) > MAX_RANGES:
+        return None
+    if 'If-Range' in request.headers:
+        if_range = request.if_range
+        if if_range.date is not None:
+            if int(if_range.date.timestamp()) != int(mtime):
+                return None
+        elif if_range.etag != etag:
+            return None
+
+    spans = []
+    for range_set in range_.ranges:
+        if range_set.begin < 0:  # Suffix range
+            begin = max(size + range_set.begin, 0)
+            end = size
+        elif range_set.end is None:
+            begin = range_set.begin
+            end = size
+        else:  # An empty suffix has an end before the begin
+            begin = range_set.begin
+            end = min(range_set.end + 1, size)
+        if begin < end:
+            spans.append((begin, end))
+
+    if sum(end - begin for begin, end in spans) > size:
+        return None
+    merged: List[Tuple[int, int]] = []
+    for begin, end in sorted(spans):
+        if merged and begin <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+def _slice_body(body: Union[bytes, FileBody], begin: int, end: int) -> Union[bytes, FileBody]:
+    if isinstance(body, FileBody):
+        part = copy(body)
+        part.begin, part.end = begin, end
+        return part
+    else:
+        return body[begin:end]
+
+
+async def _iterate_parts(
+        parts: List[Tuple[bytes, Union[bytes, FileBody]]], tail: bytes,
+) -> AsyncGenerator[bytes, None]:
+    for head, part in parts:
+        yield head
+        if isinstance(part, FileBody):
+            async for data in part:  # type: ignore
+                yield data
+        else:
+            yield part
+    yield tail
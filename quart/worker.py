@@ -7,10 +7,13 @@ from typing import Any, List, Optional  # noqa: F401
 from gunicorn.workers.base import Worker
 
 from .serving import Server
+from .serving._timer import TimerWheel
 
 
 class GunicornWorker(Worker):
 
+    http1_parser = 'h11'
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self.loop: Optional[asyncio.AbstractEventLoop] = None
@@ -37,6 +40,7 @@ class GunicornWorker(Worker):
     async def _run(self) -> None:
         ssl_context = self._create_ssl_context()
         access_logger = self.log.access_log if self.cfg.accesslog else None
+        timer_wheel = TimerWheel(self.loop)  # type: ignore
         for sock in self.sockets:
             max_fields_size = self.cfg.limit_request_fields * self.cfg.limit_request_field_size
             h11_max_incomplete_size = self.cfg.limit_request_line + max_fields_size
@@ -44,6 +48,7 @@ class GunicornWorker(Worker):
                 lambda: Server(
                     self.wsgi, self.loop, access_logger, self.cfg.access_log_format,
                     self.cfg.keepalive, h11_max_incomplete_size=h11_max_incomplete_size,
+                    timer_wheel=timer_wheel, http1_parser=self.http1_parser,
                 ),
                 sock=sock.sock, ssl=ssl_context,
             )
@@ -93,3 +98,8 @@ class GunicornUVLoopWorker(GunicornWorker):
         asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
         super().init_process()
+
+
+class GunicornHTTPToolsWorker(GunicornWorker):
+
+    http1_parser = 'httptools'
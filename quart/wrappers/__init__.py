@@ -1,6 +1,8 @@
 from ._base import BaseRequestWebsocket, JSONMixin
 from .request import Body, Request, Websocket
-from .response import Response
+from .response import FileBody, Response
 
 
-__all__ = ('BaseRequestWebsocket', 'Body', 'JSONMixin', 'Request', 'Response', 'Websocket')
+__all__ = (
+    'BaseRequestWebsocket', 'Body', 'FileBody', 'JSONMixin', 'Request', 'Response', 'Websocket',
+)
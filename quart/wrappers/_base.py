@@ -311,9 +311,9 @@ class BaseRequestWebsocket(_BaseRequestResponse):
 
     @property
     def if_modified_since(self) -> Optional[datetime]:
-        if 'If-Modified-Since' in self.headers:
+        try:
             return parsedate_to_datetime(self.headers['If-Modified-Since'])
-        else:
+        except (KeyError, TypeError, ValueError):  # Missing or invalid
             return None
 
     @property
@@ -26,6 +26,11 @@ class Body:
 
     Note: It is not possible to iterate over the data and then await
     it.
+
+    If flow control is set, receiving the data is paused whilst the
+    buffered (unconsumed) data exceeds the high water mark, and
+    resumed as it is consumed by iterating over the body. Awaiting the
+    body resumes receiving, as all the data is then required.
     """
 
     def __init__(self, max_content_length: Optional[int]) -> None:
@@ -33,6 +38,11 @@ class Body:
         self._stream: asyncio.Queue = asyncio.Queue()
         self._size = 0
         self._max_content_length = max_content_length
+        self._remaining: Optional[bytearray] = None
+        self._high_water_mark: Optional[int] = None
+        self._paused = False
+        self._pause: Optional[Callable[[], None]] = None
+        self._resume: Optional[Callable[[], None]] = None
 
     def __aiter__(self) -> 'Body':
         return self
@@ -40,20 +50,24 @@ class Body:
     async def __anext__(self) -> bytes:
         # The iterator should return whenever there is any data, but
         # quit if the body future is done i.e. there is no more data.
-        done, _ = await asyncio.wait(  # type: ignore
-            [self._body, self._stream.get()], return_when=asyncio.FIRST_COMPLETED,  # type: ignore
-        )
-        if self._body.done():
-            raise StopAsyncIteration()
-        else:
-            result = bytearray()
-            for future in done:
-                data = future.result()
-                result.extend(data)
+        if not self._body.done():
+            get = asyncio.ensure_future(self._stream.get())
+            await asyncio.wait([self._body, get], return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                data = get.result()
                 self._size -= len(data)
-            return result
+                if self._paused and self._size < self._high_water_mark:  # type: ignore
+                    self._resume_receiving()
+                return data
+            get.cancel()
+        if self._remaining:  # Data received with the completion
+            data, self._remaining = bytes(self._remaining), None
+            return data
+        raise StopAsyncIteration()
 
     def __await__(self) -> Generator[Any, None, Any]:
+        self._high_water_mark = None
+        self._resume_receiving()
         return self._body.__await__()
 
     def append(self, data: bytes) -> None:
@@ -62,13 +76,42 @@ class Body:
         if self._max_content_length is not None and self._size > self._max_content_length:
             from ..exceptions import RequestEntityTooLarge  # noqa Avoiding circular import
             raise RequestEntityTooLarge()
+        if (
+                self._high_water_mark is not None and not self._paused and
+                self._size >= self._high_water_mark
+        ):
+            self._paused = True
+            self._pause()  # type: ignore
+
+    def set_flow_control(
+            self, high_water_mark: int, pause: Callable[[], None], resume: Callable[[], None],
+    ) -> None:
+        """Set the flow control for receiving the body data.
+
+        Arguments:
+            high_water_mark: The buffered size in bytes at which to
+                pause receiving.
+            pause: Called to pause receiving the body data.
+            resume: Called to resume receiving the body data.
+        """
+        self._high_water_mark = high_water_mark
+        self._pause = pause
+        self._resume = resume
+
+    def _resume_receiving(self) -> None:
+        if self._paused:
+            self._paused = False
+            self._resume()  # type: ignore
 
     def set_complete(self) -> None:
+        self._resume_receiving()
         buffer_ = bytearray()
         try:
             while True:
                 buffer_.extend(self._stream.get_nowait())
         except asyncio.QueueEmpty:
+            # The same buffer, as copying would double the memory used
+            self._remaining = buffer_
             self._body.set_result(buffer_)
 
     def set_result(self, data: bytes) -> None:
@@ -1,9 +1,13 @@
+import os
 from datetime import datetime, timedelta
 from inspect import isasyncgen  # type: ignore
+from pathlib import Path
 from typing import (
     Any, AnyStr, AsyncGenerator, AsyncIterable, Iterable, Optional, Set, TYPE_CHECKING, Union,
 )
 
+from aiofiles import open as async_open
+
 from ._base import _BaseRequestResponse, JSONMixin
 from ..datastructures import CIMultiDict, ResponseCacheControl
 from ..utils import create_cookie
@@ -12,6 +16,48 @@ if TYPE_CHECKING:
     from .routing import Rule  # noqa
 
 
+class FileBody:
+    """A response body backed by a file.
+
+    The file is read in chunks of the buffer size as the body is
+    iterated over, so it is never fully held in memory. Servers may
+    instead send the file directly to the client, as given by the
+    ``file_path`` and the ``begin`` and ``end`` byte offsets. The
+    ``size`` and ``mtime`` are those of the file when the body is
+    created.
+
+    Arguments:
+        file_path: The path to the file.
+        buffer_size: The size of the chunks to read.
+    """
+
+    buffer_size = 64 * 1024
+
+    def __init__(self, file_path: Union[str, Path], *, buffer_size: Optional[int]=None) -> None:
+        self.file_path = Path(file_path)
+        stat = os.stat(self.file_path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.begin = 0
+        self.end = self.size
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+
+    def __len__(self) -> int:
+        return self.end - self.begin
+
+    async def __aiter__(self) -> AsyncGenerator[bytes, None]:
+        async with async_open(self.file_path, mode='rb') as file_:
+            await file_.seek(self.begin)
+            remaining = len(self)
+            while remaining > 0:
+                data = await file_.read(min(self.buffer_size, remaining))
+                if not data:
+                    return  # The file has been truncated
+                remaining -= len(data)
+                yield data
+
+
 class Response(_BaseRequestResponse, JSONMixin):
     """This class represents a response.
 
@@ -36,7 +82,7 @@ class Response(_BaseRequestResponse, JSONMixin):
 
     def __init__(
             self,
-            response: Union[AnyStr, Iterable],
+            response: Union[AnyStr, FileBody, Iterable],
             status: Optional[int]=None,
             headers: Optional[Union[dict, CIMultiDict]]=None,
             mimetype: Optional[str]=None,
@@ -80,6 +126,10 @@ class Response(_BaseRequestResponse, JSONMixin):
         self.response: AsyncIterable[bytes]
         if isinstance(response, (str, bytes)):
             self.set_data(response)  # type: ignore
+        elif isinstance(response, FileBody):
+            self.response = response  # type: ignore
+            if self.automatically_set_content_length:
+                self.headers['Content-Length'] = str(len(response))
         else:
             self.response = _ensure_aiter(response)  # type: ignore
         self.push_promises: Set[str] = set()
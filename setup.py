@@ -24,6 +24,7 @@ INSTALL_REQUIRES = [
     'itsdangerous',
     'jinja2',
     'multidict',
+    'priority>=1.3.0,<2.0',
     'sortedcontainers',
     'wsproto',
 ]
@@ -8,6 +8,7 @@ class MockTransport:
         self.data = bytearray()
         self.closed = asyncio.Event()
         self.updated = asyncio.Event()
+        self.reading_paused = False
 
     def get_extra_info(self, name: str) -> Optional[tuple]:
         if name == 'peername':
@@ -19,6 +20,12 @@ class MockTransport:
         self.data.extend(data)
         self.updated.set()
 
+    def pause_reading(self) -> None:
+        self.reading_paused = True
+
+    def resume_reading(self) -> None:
+        self.reading_paused = False
+
     def close(self) -> None:
         self.updated.set()
         self.closed.set()
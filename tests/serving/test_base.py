@@ -1,16 +1,41 @@
 import asyncio
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import pytest
 
-from quart.serving._base import HTTPProtocol
+from quart.serving._base import decode_headers, HTTPProtocol
+from quart.serving._timer import TimerWheel
 
 
 @pytest.mark.asyncio
 async def test_timeout(event_loop: asyncio.AbstractEventLoop) -> None:
     timeout = 0.1
-    protocol = HTTPProtocol(Mock(), event_loop, Mock(), None, '', timeout)  # type: ignore
+    timer_wheel = TimerWheel(event_loop, resolution=0.01)
+    protocol = HTTPProtocol(  # type: ignore
+        Mock(), event_loop, Mock(), None, '', timeout, timer_wheel=timer_wheel,
+    )
     await asyncio.sleep(0.5 * timeout)
     protocol._transport.close.assert_not_called()  # type: ignore
     await asyncio.sleep(2 * timeout)
     protocol._transport.close.assert_called_once()  # type: ignore
+
+
+def test_response_headers(event_loop: asyncio.AbstractEventLoop) -> None:
+    protocol = HTTPProtocol(Mock(), event_loop, Mock(), None, '', 5)  # type: ignore
+    with patch('quart.serving._base.time', return_value=1_000_000_000.2):
+        headers = protocol.response_headers()
+        assert headers == protocol.response_headers()
+    assert ('date', 'Sun, 09 Sep 2001 01:46:40 GMT') in headers
+    with patch('quart.serving._base.time', return_value=1_000_000_001.0):
+        assert ('date', 'Sun, 09 Sep 2001 01:46:41 GMT') in protocol.response_headers()
+
+
+def test_decode_headers() -> None:
+    headers = decode_headers(
+        [(b'content-type', b'text/html'), (b'x-multi', b'a'), (b'x-multi', b'b')],
+    )
+    assert list(headers.items()) == [
+        ('content-type', 'text/html'), ('x-multi', 'a'), ('x-multi', 'b'),
+    ]
+    assert headers['Content-Type'] == 'text/html'
+    assert headers.getall('X-Multi') == ['a', 'b']
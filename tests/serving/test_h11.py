@@ -1,14 +1,22 @@
 import asyncio
-from typing import Union
-from unittest.mock import Mock
+from pathlib import Path
+from typing import Any, AsyncGenerator, Type, Union
+from unittest.mock import Mock, patch
 
 import h11
 import pytest
+from _pytest.fixtures import FixtureRequest
+from _pytest.monkeypatch import MonkeyPatch
 
-from quart import Quart, request, ResponseReturnValue
-from quart.serving.h11 import H11Server
+from quart import Quart, request, ResponseReturnValue, send_file
+from quart.serving import Server
+from quart.serving._base import MAX_WRITE_BUFFER_SIZE
+from quart.serving.h11 import H11Server, WebsocketProtocolRequired
+from quart.serving.httptools import httptools, HTTPToolsServer
 from .helpers import MockTransport
 
+HTTP1Server = Union[H11Server, HTTPToolsServer]
+
 BASIC_HEADERS = [('Host', 'quart'), ('Connection', 'close')]
 BASIC_DATA = 'index'
 FLOW_WINDOW_SIZE = 1
@@ -34,12 +42,26 @@ def serving_app() -> Quart:
     return app
 
 
+@pytest.fixture(params=[
+    H11Server,
+    pytest.param(
+        HTTPToolsServer,
+        marks=pytest.mark.skipif(httptools is None, reason='httptools is not installed'),
+    ),
+])
+def server_class(request: FixtureRequest) -> Type[HTTP1Server]:
+    return request.param
+
+
 class MockConnection:
 
-    def __init__(self, serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
+    def __init__(
+            self, serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+            server_class: Type[HTTP1Server]=H11Server,
+    ) -> None:
         self.transport = MockTransport()
         self.client = h11.Connection(h11.CLIENT)
-        self.server = H11Server(  # type: ignore
+        self.server = server_class(  # type: ignore
             serving_app, event_loop, self.transport, None, '', 5,
         )
 
@@ -64,8 +86,11 @@ class MockConnection:
 
 
 @pytest.mark.asyncio
-async def test_get_request(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
-    connection = MockConnection(serving_app, event_loop)
+async def test_get_request(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
     await connection.send(h11.Request(method='GET', target='/', headers=BASIC_HEADERS))
     await connection.send(h11.EndOfMessage())
     await connection.transport.closed.wait()
@@ -81,8 +106,11 @@ async def test_get_request(serving_app: Quart, event_loop: asyncio.AbstractEvent
 
 
 @pytest.mark.asyncio
-async def test_post_request(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
-    connection = MockConnection(serving_app, event_loop)
+async def test_post_request(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
     await connection.send(
         h11.Request(
             method='POST', target='/echo',
@@ -101,8 +129,11 @@ async def test_post_request(serving_app: Quart, event_loop: asyncio.AbstractEven
 
 
 @pytest.mark.asyncio
-async def test_protocol_error(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
-    connection = MockConnection(serving_app, event_loop)
+async def test_protocol_error(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
     await connection.send_raw(b'broken nonsense\r\n\r\n')
     response = connection.get_events()[0]
     assert isinstance(response, h11.Response)
@@ -111,22 +142,190 @@ async def test_protocol_error(serving_app: Quart, event_loop: asyncio.AbstractEv
 
 
 @pytest.mark.asyncio
-async def test_pipelining(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
-    connection = MockConnection(serving_app, event_loop)
+async def test_pipelining(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
     # Note that h11 does not support client pipelining, so this is all raw checks
     await connection.send_raw(
         b'GET / HTTP/1.1\r\nHost: quart\r\nConnection: keep-alive\r\n\r\n'
-        b'GET / HTTP/1.1\r\nHost: quart\r\nConnection: close\r\n\r\n',
+        b'POST /echo HTTP/1.1\r\nHost: quart\r\nContent-Length: 4\r\n\r\necho'
+        b'GET /chunked HTTP/1.1\r\nHost: quart\r\nConnection: close\r\n\r\n',
     )
     await connection.transport.closed.wait()
-    assert connection.transport.data.decode().count('HTTP/1.1') == 2
+    data = connection.transport.data
+    assert data.count(b'HTTP/1.1') == 3
+    assert data.index(b'index') < data.index(b'echo') < data.index(b'chunked ')
 
 
 @pytest.mark.asyncio
-async def test_client_sends_chunked(
+async def test_pipelined_large_body(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
+    body = b'a' * 20000  # Larger than the max incomplete size
+    await connection.send_raw(
+        b'POST /echo HTTP/1.1\r\nHost: quart\r\nContent-Length: 20000\r\n\r\n' + body +
+        b'GET / HTTP/1.1\r\nHost: quart\r\n',  # Incomplete head
+    )
+    await connection.send_raw(b'Connection: close\r\n\r\n')
+    await connection.transport.closed.wait()
+    data = connection.transport.data
+    assert data.count(b'HTTP/1.1 200') == 1
+    assert data.count(b'HTTP/1.1 202') == 1
+
+
+@pytest.mark.asyncio
+async def test_pipelined_upgrade(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
+    await connection.send_raw(
+        b'GET / HTTP/1.1\r\nHost: quart\r\n\r\n'
+        b'GET /ws HTTP/1.1\r\nHost: quart\r\nConnection: Upgrade\r\n'
+        b'Upgrade: websocket\r\nSec-WebSocket-Version: 13\r\n\r\n',
+    )
+    await connection.transport.closed.wait()
+    data = connection.transport.data
+    # The upgrade is refused once the earlier response is sent
+    assert data.index(b'HTTP/1.1 202') < data.index(b'HTTP/1.1 400')
+
+
+@pytest.mark.asyncio
+async def test_pipelined_body_flow_control(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    serving_app.config['BODY_HIGH_WATER_MARK'] = 4
+    serving_app.config['H11_PIPELINE_DEPTH'] = 2  # Otherwise h11 does not parse the POST
+    responded = asyncio.Event()
+
+    @serving_app.route('/wait')
+    async def wait() -> ResponseReturnValue:
+        await responded.wait()
+        return ''
+
+    connection = MockConnection(serving_app, event_loop, server_class)
+    connection.server.data_received(
+        b'GET /wait HTTP/1.1\r\nHost: quart\r\n\r\n'
+        b'POST /echo HTTP/1.1\r\nHost: quart\r\nConnection: close\r\n'
+        b'Content-Length: 10\r\n\r\n01234',
+    )
+    assert connection.transport.reading_paused
+    responded.set()
+    for _ in range(5):  # Yield to allow the echo view to consume the body
+        await asyncio.sleep(0)
+    assert not connection.transport.reading_paused
+    await connection.send_raw(b'56789')
+    await connection.transport.closed.wait()
+    assert connection.transport.data.endswith(b'0123456789')
+
+
+@pytest.mark.asyncio
+async def test_pipelined_unread_body(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    @serving_app.route('/unread', methods=['POST'])
+    async def unread() -> ResponseReturnValue:
+        return 'unread'
+
+    connection = MockConnection(serving_app, event_loop, server_class)
+    body = b'a' * 2 ** 20  # Larger than the body high water mark
+    await connection.send_raw(
+        b'POST /unread HTTP/1.1\r\nHost: quart\r\nContent-Length: %d\r\n\r\n' % len(body) +
+        body[:2 ** 19],
+    )
+    for _ in range(5):  # Yield to allow the view to respond
+        await asyncio.sleep(0)
+    await connection.send_raw(
+        body[2 ** 19:] + b'GET / HTTP/1.1\r\nHost: quart\r\nConnection: close\r\n\r\n',
+    )
+    await connection.transport.closed.wait()
+    data = connection.transport.data
+    assert data.index(b'unread') < data.index(b'HTTP/1.1 202')
+
+
+@pytest.mark.asyncio
+async def test_pipelined_protocol_error(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    serving_app.config['H11_PIPELINE_DEPTH'] = 4
+    connection = MockConnection(serving_app, event_loop, server_class)
+    await connection.send_raw(
+        b'GET / HTTP/1.1\r\nHost: quart\r\n\r\n'
+        b'GET /chunked HTTP/1.1\r\nHost: quart\r\nConnection: close\r\n\r\n'
+        b'GET / HTTP/1.1\r\nHost: quart\r\n\r\n',
+    )
+    await connection.transport.closed.wait()
+    data = connection.transport.data
+    # The valid requests are responded to before the connection closes
+    assert data.index(b'index') < data.index(b'chunked ')
+
+    connection = MockConnection(serving_app, event_loop, server_class)
+    await connection.send_raw(
+        b'GET / HTTP/1.1\r\nHost: quart\r\n\r\n'
+        b'GET /chunked HTTP/1.1\r\nHost: quart\r\n\r\n'
+        b'broken nonsense\r\n\r\n',
+    )
+    await connection.transport.closed.wait()
+    data = connection.transport.data
+    assert data.index(b'index') < data.index(b'chunked ') < data.index(b'HTTP/1.1 400')
+
+
+@pytest.mark.asyncio
+async def test_keep_alive(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
+    await connection.send(h11.Request(method='GET', target='/', headers=[('Host', 'quart')]))
+    connection.client.send(h11.EndOfMessage())  # Empty, as data_received(b'') is an EOF
+    await connection.transport.updated.wait()
+    response, *_, end = connection.get_events()
+    assert response.status_code == 202
+    assert isinstance(end, h11.EndOfMessage)
+    assert not connection.transport.closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_pipelining(
         serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
 ) -> None:
+    serving_app.config['H11_PIPELINE_DEPTH'] = 2
+    second_started = asyncio.Event()
+
+    @serving_app.route('/first')
+    async def first() -> ResponseReturnValue:
+        await second_started.wait()  # Deadlocks if handled serially
+        return 'first'
+
+    @serving_app.route('/second')
+    async def second() -> ResponseReturnValue:
+        second_started.set()
+        return 'second'
+
     connection = MockConnection(serving_app, event_loop)
+    await connection.send_raw(
+        b'GET /first HTTP/1.1\r\nHost: quart\r\nConnection: keep-alive\r\n\r\n'
+        b'GET /second HTTP/1.1\r\nHost: quart\r\nConnection: close\r\n\r\n',
+    )
+    await asyncio.wait_for(connection.transport.closed.wait(), 1)
+    data = connection.transport.data.decode()
+    assert data.count('HTTP/1.1 200') == 2
+    assert data.index('first') < data.index('second')
+
+
+@pytest.mark.asyncio
+async def test_client_sends_chunked(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    connection = MockConnection(serving_app, event_loop, server_class)
     chunked_headers = [('transfer-encoding', 'chunked'), ('expect', '100-continue')]
     await connection.send(
         h11.Request(method='POST', target='/echo', headers=BASIC_HEADERS + chunked_headers),
@@ -150,21 +349,156 @@ async def test_client_sends_chunked(
 @pytest.mark.asyncio
 async def test_server_sends_chunked(
         serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
 ) -> None:
-    connection = MockConnection(serving_app, event_loop)
+    connection = MockConnection(serving_app, event_loop, server_class)
     await connection.send(h11.Request(method='GET', target='/chunked', headers=BASIC_HEADERS))
     await connection.send(h11.EndOfMessage())
     await connection.transport.closed.wait()
     events = connection.get_events()
     response, *data, end = events
     assert isinstance(response, h11.Response)
+    assert (b'transfer-encoding', b'chunked') in response.headers
     assert all(isinstance(datum, h11.Data) for datum in data)
     assert b''.join(datum.data for datum in data).decode() == 'chunked data'
     assert isinstance(end, h11.EndOfMessage)
 
 
-def test_max_incomplete_size() -> None:
+@pytest.mark.asyncio
+async def test_server_coalesces_writes(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+
+    @serving_app.route('/stream')
+    async def stream() -> ResponseReturnValue:
+        async def _generate() -> AsyncGenerator[bytes, None]:
+            yield b'first '
+            yield b'chunks '
+            await asyncio.sleep(0)
+            yield b'later'
+        return _generate()
+
+    for path, writes in [('/chunked', 1), ('/stream', 2)]:
+        connection = MockConnection(serving_app, event_loop, server_class)
+        with patch.object(
+                connection.transport, 'write', wraps=connection.transport.write,
+        ) as mock_write:
+            await connection.send(h11.Request(method='GET', target=path, headers=BASIC_HEADERS))
+            await connection.send(h11.EndOfMessage())
+            await connection.transport.closed.wait()
+        assert mock_write.call_count == writes
+        response, *data, end = connection.get_events()
+        assert isinstance(response, h11.Response)
+        assert isinstance(end, h11.EndOfMessage)
+
+
+@pytest.mark.asyncio
+async def test_server_waits_for_drain(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    chunk = b'a' * MAX_WRITE_BUFFER_SIZE
+
+    @serving_app.route('/large')
+    async def large() -> ResponseReturnValue:
+        return [chunk, chunk, chunk]  # type: ignore
+
+    connection = MockConnection(serving_app, event_loop, server_class)
+    connection.server.pause_writing()
+    await connection.send(h11.Request(method='GET', target='/large', headers=BASIC_HEADERS))
+    await connection.send(h11.EndOfMessage())
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert chunk in connection.transport.data
+    assert len(connection.transport.data) < 2 * len(chunk)
+    connection.server.resume_writing()
+    await connection.transport.closed.wait()
+    response, *data, end = connection.get_events()
+    assert b''.join(datum.data for datum in data) == 3 * chunk
+    assert isinstance(end, h11.EndOfMessage)
+
+
+@pytest.mark.asyncio
+async def test_request_body_flow_control(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server],
+) -> None:
+    serving_app.config['BODY_HIGH_WATER_MARK'] = 4
+
+    @serving_app.route('/stream', methods=['POST'])
+    async def stream() -> ResponseReturnValue:
+        data = bytearray()
+        async for chunk in request.body:
+            data.extend(chunk)
+        return data.decode()
+
+    connection = MockConnection(serving_app, event_loop, server_class)
+    await connection.send(h11.Request(
+        method='POST', target='/stream', headers=BASIC_HEADERS + [('content-length', '10')],
+    ))
+    connection.server.data_received(connection.client.send(h11.Data(data=b'01234')))
+    assert connection.transport.reading_paused
+    for _ in range(5):  # Yield to allow the view to consume the body
+        await asyncio.sleep(0)
+    assert not connection.transport.reading_paused
+    await connection.send(h11.Data(data=b'56789'))
+    await connection.send(h11.EndOfMessage())
+    await connection.transport.closed.wait()
+    response, *data, end = connection.get_events()
+    assert b''.join(datum.data for datum in data) == b'0123456789'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('loop_sendfile', [True, False])
+async def test_send_file(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+        server_class: Type[HTTP1Server], tmpdir: Path, monkeypatch: MonkeyPatch,
+        loop_sendfile: bool,
+) -> None:
+    if not loop_sendfile:  # As with uvloop, which inherits the abstract sendfile
+        async def sendfile(*args: Any, **kwargs: Any) -> None:
+            raise NotImplementedError()
+
+        monkeypatch.setattr(event_loop, 'sendfile', sendfile, raising=False)
+    file_path = tmpdir.join('file')  # type: ignore
+    file_data = bytes(range(256)) * 2 ** 14  # Enough to fill the socket's buffers
+    file_path.write(file_data, mode='wb')
+
+    @serving_app.route('/file')
+    async def file_() -> ResponseReturnValue:
+        return await send_file(str(file_path))
+
+    parser = 'h11' if server_class is H11Server else 'httptools'
+    server = await event_loop.create_server(
+        lambda: Server(serving_app, event_loop, None, '', 5, http1_parser=parser),
+        '127.0.0.1', 0,
+    )
+    port = server.sockets[0].getsockname()[1]  # type: ignore
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, loop=event_loop)
+    for _ in range(2):  # The connection is kept alive after the file
+        writer.write(b'GET /file HTTP/1.1\r\nHost: quart\r\n\r\n')
+        head = await reader.readuntil(b'\r\n\r\n')
+        assert f"content-length: {len(file_data)}\r\n".encode() in head.lower()
+        await asyncio.sleep(0.05)  # Allow the socket to become full
+        assert (await reader.readexactly(len(file_data))) == file_data
+    writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+def test_max_incomplete_size(server_class: Type[HTTP1Server]) -> None:
     transport = MockTransport()
-    server = H11Server(Mock(), Mock(), transport, None, '', 5, max_incomplete_size=5)  # type: ignore # noqa: E501
+    server = server_class(Mock(), Mock(), transport, None, '', 5, max_incomplete_size=5)  # type: ignore # noqa: E501
     server.data_received(b'GET / HTTP/1.1\r\nHost: quart\r\n')  # Longer than 5 bytes
     assert transport.data.startswith(b'HTTP/1.1 400')
+
+
+def test_websocket_upgrade(server_class: Type[HTTP1Server]) -> None:
+    server = server_class(Mock(), Mock(), MockTransport(), None, '', 5)  # type: ignore
+    with pytest.raises(WebsocketProtocolRequired) as error_info:
+        server.data_received(
+            b'GET /ws HTTP/1.1\r\nHost: quart\r\nConnection: Upgrade\r\n'
+            b'Upgrade: websocket\r\nSec-WebSocket-Version: 13\r\n\r\n',
+        )
+    assert error_info.value.request.target == b'/ws'
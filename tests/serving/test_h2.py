@@ -4,8 +4,8 @@ from typing import AsyncGenerator
 import h2
 import pytest
 
-from quart import make_response, Quart, ResponseReturnValue
-from quart.serving.h2 import H2Server
+from quart import make_response, Quart, request, ResponseReturnValue
+from quart.serving.h2 import DEFAULT_WINDOW_SIZE, H2Server
 
 BASIC_H2_HEADERS = [
     (':authority', 'quart'), (':path', '/'), (':scheme', 'https'), (':method', 'GET'),
@@ -25,6 +25,13 @@ def serving_app() -> Quart:
     async def index() -> ResponseReturnValue:
         return BASIC_DATA, 202, {'X-Test': 'Test'}
 
+    @app.route('/stream', methods=['POST'])
+    async def stream() -> ResponseReturnValue:
+        data = bytearray()
+        async for chunk in request.body:
+            data.extend(chunk)
+        return data.decode()
+
     @app.route('/push')
     async def push() -> ResponseReturnValue:
         response = await make_response(BASIC_DATA, 202, {'X-Test': 'Test'})
@@ -40,6 +47,7 @@ class MockTransport:
         self.data = bytearray()
         self.closed = asyncio.Event()
         self.updated = asyncio.Event()
+        self.writes = 0
 
     def get_extra_info(self, _: str) -> tuple:
         return ('127.0.0.1',)
@@ -47,6 +55,7 @@ class MockTransport:
     def write(self, data: bytes) -> None:
         assert not self.closed.is_set()
         self.data.extend(data)
+        self.writes += 1
         self.updated.set()
 
     def close(self) -> None:
@@ -67,12 +76,12 @@ class MockH2Connection:
         )
         self.connection = h2.connection.H2Connection()
 
-    def send_request(self, headers: list, settings: dict) -> int:
+    def send_request(self, headers: list, settings: dict, end_stream: bool=True) -> int:
         self.connection.initiate_connection()
         self.connection.update_settings(settings)
         self.server.data_received(self.connection.data_to_send())
         stream_id = self.connection.get_next_available_stream_id()
-        self.connection.send_headers(stream_id, headers, end_stream=True)
+        self.connection.send_headers(stream_id, headers, end_stream=end_stream)
         self.server.data_received(self.connection.data_to_send())
         return stream_id
 
@@ -137,6 +146,50 @@ async def test_h2_flow_control(serving_app: Quart, event_loop: asyncio.AbstractE
     assert response_data.decode() == BASIC_DATA
 
 
+@pytest.mark.asyncio
+async def test_h2_large_response(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+) -> None:
+    body = ''.join(chr(ord('a') + index % 26) for index in range(2 ** 18))  # Many frames
+
+    @serving_app.route('/large')
+    async def large() -> ResponseReturnValue:
+        return body
+
+    headers = [
+        (':authority', 'quart'), (':path', '/large'), (':scheme', 'https'), (':method', 'GET'),
+    ]
+    connection = MockH2Connection(serving_app, event_loop)
+    connection.send_request(headers, {})
+    response_data = b''
+    async for event in connection.get_events():
+        if isinstance(event, h2.events.DataReceived):
+            response_data += event.data
+        elif isinstance(event, h2.events.StreamEnded):
+            break
+    assert response_data.decode() == body
+
+
+@pytest.mark.asyncio
+async def test_h2_coalesced_writes(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+) -> None:
+    connection = MockH2Connection(serving_app, event_loop)
+    connection.connection.initiate_connection()
+    for _ in range(10):
+        stream_id = connection.connection.get_next_available_stream_id()
+        connection.connection.send_headers(stream_id, BASIC_H2_HEADERS, end_stream=True)
+    connection.transport.writes = 0
+    connection.server.data_received(connection.connection.data_to_send())
+    assert connection.transport.writes == 1
+    connection.transport.clear()
+    connection.transport.writes = 0
+    await asyncio.sleep(0.1)  # Allow the responses to be sent
+    events = connection.connection.receive_data(connection.transport.data)
+    assert len([event for event in events if isinstance(event, h2.events.StreamEnded)]) == 10
+    assert connection.transport.writes < 10
+
+
 @pytest.mark.asyncio
 async def test_h2_push(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
     connection = MockH2Connection(serving_app, event_loop)
@@ -155,3 +208,172 @@ async def test_h2_push(serving_app: Quart, event_loop: asyncio.AbstractEventLoop
             if streams_received == 2:
                 break
     assert push_received
+
+
+@pytest.mark.asyncio
+async def test_h2_priority(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
+    @serving_app.route('/large')
+    async def large() -> ResponseReturnValue:
+        return 'a' * 3 * 16384
+
+    headers = [
+        (':authority', 'quart'), (':path', '/large'), (':scheme', 'https'), (':method', 'GET'),
+    ]
+    connection = MockH2Connection(serving_app, event_loop)
+    first_id = connection.send_request(headers, {})
+    second_id = connection.connection.get_next_available_stream_id()
+    connection.connection.send_headers(
+        second_id, headers, end_stream=True, priority_depends_on=first_id,
+    )
+    connection.server.data_received(connection.connection.data_to_send())
+    data_stream_ids = []
+    streams_ended = 0
+    async for event in connection.get_events():
+        if isinstance(event, h2.events.DataReceived):
+            data_stream_ids.append(event.stream_id)
+        elif isinstance(event, h2.events.StreamEnded):
+            streams_ended += 1
+            if streams_ended == 2:
+                break
+    # The second stream depends on the first, so is sent after it
+    first_count = data_stream_ids.count(first_id)
+    assert data_stream_ids[:first_count] == [first_id] * first_count
+    assert data_stream_ids[first_count:] == [second_id] * (len(data_stream_ids) - first_count)
+
+
+@pytest.mark.asyncio
+async def test_h2_many_priority_frames(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+) -> None:
+    connection = MockH2Connection(serving_app, event_loop)
+    connection.connection.initiate_connection()
+    for stream_id in range(101, 2101, 2):  # More than the priority tree's limit
+        connection.connection.prioritize(stream_id, depends_on=stream_id + 2)
+    connection.server.data_received(connection.connection.data_to_send())
+    stream_id = connection.connection.get_next_available_stream_id()
+    connection.connection.send_headers(stream_id, BASIC_H2_HEADERS, end_stream=True)
+    connection.server.data_received(connection.connection.data_to_send())
+    response_data = b''
+    async for event in connection.get_events():
+        if isinstance(event, h2.events.DataReceived):
+            response_data += event.data
+        elif isinstance(event, h2.events.StreamEnded):
+            break
+    assert response_data.decode() == BASIC_DATA
+
+
+@pytest.mark.asyncio
+async def test_h2_reset_with_window_update(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+) -> None:
+
+    @serving_app.route('/large')
+    async def large() -> ResponseReturnValue:
+        return 'a' * 2 * DEFAULT_WINDOW_SIZE
+
+    headers = [
+        (':authority', 'quart'), (':path', '/large'), (':scheme', 'https'), (':method', 'GET'),
+    ]
+    connection = MockH2Connection(serving_app, event_loop)
+    reset_id = connection.send_request(headers, {})
+    other_id = connection.connection.get_next_available_stream_id()
+    connection.connection.send_headers(other_id, headers, end_stream=True)
+    connection.server.data_received(connection.connection.data_to_send())
+    for _ in range(10):  # Yield until the connection window is used
+        await asyncio.sleep(0)
+    connection.connection.receive_data(connection.transport.data)
+    connection.transport.clear()
+    connection.connection.reset_stream(reset_id)
+    connection.connection.increment_flow_control_window(2 * DEFAULT_WINDOW_SIZE)
+    connection.connection.increment_flow_control_window(2 * DEFAULT_WINDOW_SIZE, other_id)
+    connection.server.data_received(connection.connection.data_to_send())
+    async for event in connection.get_events():
+        if isinstance(event, h2.events.StreamEnded):
+            assert event.stream_id == other_id
+            break
+
+
+@pytest.mark.asyncio
+async def test_h2_request_body_flow_control(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+) -> None:
+    serving_app.config['BODY_HIGH_WATER_MARK'] = 4
+    connection = MockH2Connection(serving_app, event_loop)
+    stream_id = connection.send_request(
+        [(':authority', 'quart'), (':path', '/stream'), (':scheme', 'https'), (':method', 'POST')],
+        {}, end_stream=False,
+    )
+    connection.connection.send_data(stream_id, b'0123456789')
+    connection.server.data_received(connection.connection.data_to_send())
+    assert connection.server.streams[stream_id].unacknowledged == 10  # type: ignore
+    for _ in range(5):  # Yield to allow the view to consume the body
+        await asyncio.sleep(0)
+    assert connection.server.streams[stream_id].unacknowledged == 0  # type: ignore
+    connection.connection.end_stream(stream_id)
+    connection.server.data_received(connection.connection.data_to_send())
+    response_data = b''
+    async for event in connection.get_events():
+        if isinstance(event, h2.events.DataReceived):
+            response_data += event.data
+        elif isinstance(event, h2.events.StreamEnded):
+            break
+    assert response_data == b'0123456789'
+
+
+@pytest.mark.asyncio
+async def test_h2_paused_stream_reopens_connection_window(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+) -> None:
+    serving_app.config['BODY_HIGH_WATER_MARK'] = 4
+    connection = MockH2Connection(serving_app, event_loop)
+    stream_id = connection.send_request(
+        [(':authority', 'quart'), (':path', '/stream'), (':scheme', 'https'), (':method', 'POST')],
+        {}, end_stream=False,
+    )
+    connection.transport.clear()
+    connection.connection.send_data(stream_id, b'0123456789')
+    connection.server.data_received(connection.connection.data_to_send())
+    events = connection.connection.receive_data(connection.transport.data)
+    window_updates = [event for event in events if isinstance(event, h2.events.WindowUpdated)]
+    assert [(event.stream_id, event.delta) for event in window_updates] == [(0, 10)]
+
+
+@pytest.mark.asyncio
+async def test_h2_window_sizes(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
+    serving_app.config['H2_CONNECTION_WINDOW_SIZE'] = 2 ** 24
+    serving_app.config['H2_INITIAL_WINDOW_SIZE'] = 2 ** 20
+    connection = MockH2Connection(serving_app, event_loop)
+    connection.connection.initiate_connection()
+    connection.connection.receive_data(connection.transport.data)
+    assert connection.connection.remote_settings.initial_window_size == 2 ** 20
+    assert connection.connection.outbound_flow_control_window == 2 ** 24
+
+
+@pytest.mark.asyncio
+async def test_h2_settings(serving_app: Quart, event_loop: asyncio.AbstractEventLoop) -> None:
+    serving_app.config['H2_HEADER_TABLE_SIZE'] = 2 ** 16
+    serving_app.config['H2_MAX_CONCURRENT_STREAMS'] = 2
+    serving_app.config['H2_MAX_FRAME_SIZE'] = 2 ** 20
+    serving_app.config['H2_INITIAL_WINDOW_SIZE'] = 2 ** 21
+    serving_app.config['H2_CONNECTION_WINDOW_SIZE'] = 2 ** 21
+    connection = MockH2Connection(serving_app, event_loop)
+    stream_id = connection.send_request(
+        [(':method', 'POST'), (':path', '/stream'), (':authority', 'quart'), (':scheme', 'https')],
+        {}, end_stream=False,
+    )
+    connection.connection.receive_data(connection.transport.data)
+    settings = connection.connection.remote_settings
+    assert settings.header_table_size == 2 ** 16
+    assert settings.max_concurrent_streams == 2
+    assert settings.max_frame_size == 2 ** 20
+    # The client may send frames up to the maximum size
+    connection.transport.clear()
+    connection.connection.send_data(stream_id, b'a' * 2 ** 20, end_stream=True)
+    connection.server.data_received(connection.connection.data_to_send())
+    response_data = b''
+    async for event in connection.get_events():
+        if isinstance(event, h2.events.DataReceived):
+            response_data += event.data
+        elif isinstance(event, h2.events.StreamEnded):
+            break
+    assert response_data == b'a' * 2 ** 20
@@ -0,0 +1,63 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from quart.serving._timer import Timed, TimerWheel
+
+RESOLUTION = 0.01
+
+
+class MockTimed(Timed):
+
+    def __init__(self) -> None:
+        self.timed_out = False
+
+    def _handle_timeout(self) -> None:
+        self.timed_out = True
+
+
+@pytest.mark.asyncio
+async def test_timeout(event_loop: asyncio.AbstractEventLoop) -> None:
+    timer_wheel = TimerWheel(event_loop, resolution=RESOLUTION, size=4)
+    timed = MockTimed()
+    timer_wheel.schedule(timed, 10 * RESOLUTION)  # Longer than the wheel
+    await asyncio.sleep(5 * RESOLUTION)
+    assert not timed.timed_out
+    await asyncio.sleep(10 * RESOLUTION)
+    assert timed.timed_out
+    assert len(timer_wheel) == 0
+    assert timer_wheel._handle is None  # Stops ticking when empty
+
+
+@pytest.mark.asyncio
+async def test_refresh_and_cancel(event_loop: asyncio.AbstractEventLoop) -> None:
+    timer_wheel = TimerWheel(event_loop, resolution=RESOLUTION)
+    refreshed = MockTimed()
+    cancelled = MockTimed()
+    timer_wheel.schedule(refreshed, 5 * RESOLUTION)
+    timer_wheel.schedule(cancelled, 5 * RESOLUTION)
+    timer_wheel.cancel(cancelled)
+    for _ in range(4):
+        await asyncio.sleep(3 * RESOLUTION)
+        timer_wheel.refresh(refreshed)
+    assert not refreshed.timed_out
+    await asyncio.sleep(10 * RESOLUTION)
+    assert refreshed.timed_out
+    assert not cancelled.timed_out
+    timer_wheel.refresh(cancelled)  # Refresh does not schedule
+    assert len(timer_wheel) == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_exception(event_loop: asyncio.AbstractEventLoop) -> None:
+    timer_wheel = TimerWheel(event_loop, resolution=RESOLUTION)
+    broken = Timed()  # Does not implement _handle_timeout
+    timed = MockTimed()
+    exception_handler = Mock()
+    event_loop.set_exception_handler(exception_handler)
+    timer_wheel.schedule(broken, RESOLUTION)
+    timer_wheel.schedule(timed, 5 * RESOLUTION)
+    await asyncio.sleep(10 * RESOLUTION)
+    exception_handler.assert_called_once()
+    assert timed.timed_out
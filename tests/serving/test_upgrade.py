@@ -1,11 +1,14 @@
 import asyncio
+from typing import List
 from unittest.mock import Mock
 
+import h2.connection
+import h2.events
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 
 import quart.serving._base
-from quart import Quart
+from quart import Quart, request
 from quart.serving import Server
 from .helpers import MockTransport
 
@@ -18,6 +21,10 @@ def serving_app() -> Quart:
     async def index() -> str:
         return 'index'
 
+    @app.route('/body')
+    async def body() -> str:
+        return (await request.get_data()).decode()
+
     @app.websocket('/ws')
     async def ws() -> None:
         return None
@@ -67,6 +74,38 @@ async def test_h2c_upgrade(
     )
 
 
+@pytest.mark.asyncio
+async def test_h2c_upgrade_request_body(
+        serving_app: Quart, event_loop: asyncio.AbstractEventLoop,
+) -> None:
+    server = Server(serving_app, event_loop, None, '', 5)  # type: ignore
+    transport = MockTransport()
+    server.connection_made(transport)  # type: ignore
+    connection = h2.connection.H2Connection()
+    settings = connection.initiate_upgrade_connection()
+    server.data_received(
+        b'GET /body HTTP/1.1\r\n'
+        b'Host: localhost\r\n'
+        b'Connection: Upgrade, HTTP2-Settings\r\n'
+        b'Upgrade: h2c\r\n'
+        b'HTTP2-Settings: ' + settings + b'\r\n'
+        b'\r\n',
+    )
+    await transport.updated.wait()
+    transport.clear()
+    server.data_received(connection.data_to_send())
+    events: List[h2.events.Event] = []
+    while not any(isinstance(event, h2.events.StreamEnded) for event in events):
+        await transport.updated.wait()
+        events.extend(connection.receive_data(transport.data))
+        transport.clear()
+    # The upgrade request's body is complete, and so empty
+    assert b''.join(
+        event.data for event in events if isinstance(event, h2.events.DataReceived)
+    ) == b''
+    assert any(isinstance(event, h2.events.ResponseReceived) for event in events)
+
+
 @pytest.mark.asyncio
 async def test_websocket_upgrade(
         serving_app: Quart, event_loop: asyncio.AbstractEventLoop, monkeypatch: MonkeyPatch,
@@ -1,6 +1,11 @@
+from hashlib import sha256
+from pathlib import Path
+
 import pytest
 
-from quart import abort, Blueprint, Quart, render_template_string, request, ResponseReturnValue
+from quart import (
+    abort, Blueprint, Quart, render_template_string, request, ResponseReturnValue, url_for,
+)
 
 
 @pytest.mark.asyncio
@@ -81,3 +86,24 @@ async def test_blueprint_error_handler() -> None:
     response = await app.test_client().get('/error/')
     assert response.status_code == 409
     assert b'Something Unique' in (await response.get_data())
+
+
+@pytest.mark.asyncio
+async def test_blueprint_static(tmpdir: Path) -> None:
+    app = Quart(__name__)
+    app.config['STATIC_FINGERPRINT'] = True
+    blueprint = Blueprint('blueprint', __name__, static_folder=str(tmpdir))
+    blueprint.static_url_path = '/static'
+    app.register_blueprint(blueprint, url_prefix='/blueprint')
+    tmpdir.join('app.js').write(b'var a;', mode='wb')  # type: ignore
+    async with app.test_request_context('GET', '/'):
+        await blueprint._get_static_fingerprints().load('app.js')
+        url = url_for('blueprint.static', filename='app.js')
+    assert url == f"/blueprint/static/app.{sha256(b'var a;').hexdigest()[:12]}.js"
+
+    test_client = app.test_client()
+    response = await test_client.get(url)
+    assert response.cache_control.immutable
+    assert (await response.get_data()) == b'var a;'  # type: ignore
+    response = await test_client.get('/blueprint/static/app.js')
+    assert (await response.get_data()) == b'var a;'  # type: ignore
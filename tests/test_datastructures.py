@@ -20,6 +20,9 @@ def test_accept_best_match() -> None:
     assert accept.best_match(['gzip', 'defalte']) == 'gzip'
     assert accept.best_match(['br', 'deflate']) == 'deflate'
     assert accept.best_match(['bizarre']) == 'bizarre'
+    accept = Accept('gzip;q=0, *')
+    assert accept.best_match(['gzip'], 'identity') == 'identity'
+    assert accept.best_match(['gzip', 'br']) == 'br'
 
 
 def test_charset_accept_best_match() -> None:
@@ -76,6 +79,8 @@ def test_etags() -> None:
     assert etags.weak == {'67ab43'}
     assert etags.strong == {'54ed21'}
     assert '54ed21' in etags
+    assert '67ab43' not in etags
+    assert etags.contains_weak('67ab43')
     assert etags.to_header() == 'W/"67ab43","54ed21"'
 
 
@@ -88,3 +93,11 @@ def test_range() -> None:
     assert range_.units == 'bytes'
     assert range_.ranges == [RangeSet(-999, None)]
     assert range_.to_header() == 'bytes=-999'
+    range_ = Range.from_header('bytes=500-')
+    assert range_.ranges == [RangeSet(500, None)]
+    assert range_.to_header() == 'bytes=500-'
+    assert Range.from_header('bytes=a-b').ranges == []
+    assert Range.from_header('bytes=5-1').ranges == []
+    range_ = Range.from_header('bytes=-0')
+    assert range_.ranges == [RangeSet(0, -1)]
+    assert range_.to_header() == 'bytes=-0'
@@ -1,5 +1,6 @@
 import uuid
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import patch
 
 import hypothesis.strategies as strategies
 import pytest
@@ -7,7 +8,7 @@ from hypothesis import given
 
 from quart.exceptions import MethodNotAllowed, NotFound, RedirectRequired
 from quart.routing import (
-    FloatConverter, IntegerConverter, Map, Rule, StringConverter, UUIDConverter,
+    CacheInfo, FloatConverter, IntegerConverter, Map, Rule, StringConverter, UUIDConverter,
 )
 
 
@@ -227,3 +228,163 @@ def test_string_converter_match() -> None:
     map_.add(Rule('/<string(length=2):value>', ['GET'], 'string'))
     _test_match(map_, '/uk', 'GET', (map_.endpoints['string'][0], {'value': 'uk'}))
     _test_no_match(map_, '/usa', 'GET')
+
+
+def test_literal_parts_are_escaped() -> None:
+    map_ = Map()
+    map_.add(Rule('/file.txt', ['GET'], 'file'))
+    _test_match(map_, '/file.txt', 'GET', (map_.endpoints['file'][0], {}))
+    _test_no_match(map_, '/filextxt', 'GET')
+
+
+def test_many_rules_ordering() -> None:
+    map_ = Map()
+    for index in range(100):
+        map_.add(Rule(f"/api/{index}/<int:id>", ['GET'], f"api{index}"))
+    map_.add(Rule('/api/<path:rest>', ['GET', 'POST'], 'api_path'))
+    _test_match(map_, '/api/99/1', 'GET', (map_.endpoints['api99'][0], {'id': 1}))
+    _test_match(map_, '/api/99/a', 'GET', (map_.endpoints['api_path'][0], {'rest': '99/a'}))
+    adapter = map_.bind_to_request('http', '', 'PUT', '/api/99/1')
+    with pytest.raises(MethodNotAllowed) as error:
+        adapter.match()
+    assert error.value.allowed_methods == {'GET', 'HEAD', 'POST'}
+
+
+def test_static_and_complex_priority() -> None:
+    map_ = Map()
+    map_.add(Rule('/page', ['GET'], 'static'))
+    map_.add(Rule('/<name>', ['GET', 'POST'], 'complex'))
+    _test_match(map_, '/page', 'GET', (map_.endpoints['static'][0], {}))
+    _test_match(map_, '/page', 'POST', (map_.endpoints['complex'][0], {'name': 'page'}))
+    map_.add(Rule('/<name>', ['GET'], 'complex_defaults', defaults={'page': 1}))
+    _test_match(
+        map_, '/page', 'GET', (map_.endpoints['complex_defaults'][0], {'name': 'page', 'page': 1}),
+    )
+    adapter = map_.bind_to_request('http', '', 'GET', '/page')
+    assert adapter.allowed_methods() == {'GET', 'HEAD', 'POST'}
+
+
+def test_match_cache() -> None:
+    map_ = Map(match_cache_size=2)
+    map_.add(Rule('/', ['GET'], 'index'))
+    map_.add(Rule('/book/<int:page>', ['GET'], 'book'))
+    _test_match(map_, '/book/1', 'GET', (map_.endpoints['book'][0], {'page': 1}))
+    adapter = map_.bind_to_request('http', '', 'GET', '/book/1')
+    _, view_args = adapter.match()
+    view_args.pop('page')
+    _test_match(map_, '/book/1', 'GET', (map_.endpoints['book'][0], {'page': 1}))
+    _test_no_match(map_, '/other', 'GET')
+    _test_no_match(map_, '/other', 'GET')
+    _test_match(map_, '/', 'GET', (map_.endpoints['index'][0], {}))
+    assert map_.match_cache_info() == CacheInfo(hits=3, misses=3, maxsize=2, currsize=2)
+    map_.add(Rule('/other', ['GET'], 'other'))
+    assert map_.match_cache_info().currsize == 0
+    _test_match(map_, '/other', 'GET', (map_.endpoints['other'][0], {}))
+
+
+def test_build_cache() -> None:
+    map_ = Map()
+    map_.add(Rule('/book/<page>', ['GET'], 'book'))
+    adapter = map_.bind('http', '')
+    assert adapter.build('book', values={'page': 1}) == '/book/1'
+    assert adapter.build('book', values={'page': True}) == '/book/True'
+    assert adapter.build('book', values={'page': 1}) == '/book/1'
+    assert adapter.build('book', values={'page': 1, 'line': [1]}) == '/book/1?line=%5B1%5D'
+    assert map_.build_cache_info() == CacheInfo(hits=1, misses=2, maxsize=1024, currsize=2)
+    map_.add(Rule('/', ['GET'], 'index'))
+    assert map_.build_cache_info().currsize == 0
+
+
+def test_build_cache_values() -> None:
+    class Page:
+        number = 1
+
+        def __str__(self) -> str:
+            return str(self.number)
+
+    map_ = Map()
+    map_.add(Rule('/book/<page>', ['GET'], 'book'))
+    adapter = map_.bind('http', '')
+    page = Page()
+    assert adapter.build('book', values={'page': page}) == '/book/1'
+    page.number = 2
+    assert adapter.build('book', values={'page': page}) == '/book/2'
+    assert adapter.build('book', values={'page': 1, 'a': 1, 'b': 2}) == '/book/1?a=1&b=2'
+    assert adapter.build('book', values={'page': 1, 'b': 2, 'a': 1}) == '/book/1?b=2&a=1'
+    assert map_.build_cache_info().currsize == 2
+
+
+def test_host_partitioning() -> None:
+    class OtherHostRule(Rule):
+
+        def match(self, path: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+            raise AssertionError('Rule for another host was checked')
+
+        def _convert(self, values: Dict[str, str]) -> Optional[Dict[str, Any]]:
+            raise AssertionError('Rule for another host was checked')
+
+    map_ = Map()
+    map_.host_matching = True
+    map_.add(Rule('/<path:page>', ['GET'], 'quart', host='quart.com'))
+    map_.add(Rule('/<int:id>', ['GET'], 'quart_id', host='quart.com'))
+    map_.add(Rule('/', ['GET'], 'sub', host='<sub>.quart.com'))
+    map_.add(OtherHostRule('/<path:page>', ['GET'], 'other', host='other.com'))
+    map_.add(OtherHostRule('/<int:id>', ['GET'], 'other_id', host='other.com'))
+    _test_match(map_, '/1', 'GET', (map_.endpoints['quart_id'][0], {'id': 1}), host='quart.com')
+    _test_match(map_, '/a/b', 'GET', (map_.endpoints['quart'][0], {'page': 'a/b'}), host='quart.com')  # noqa: E501
+    _test_match(map_, '/', 'GET', (map_.endpoints['sub'][0], {'sub': 'www'}), host='www.quart.com')
+
+
+def test_allowed_methods_reuses_match(basic_map: Map) -> None:
+    adapter = basic_map.bind_to_request('http', '', 'OPTIONS', '/')
+    with pytest.raises(MethodNotAllowed):
+        adapter.match()
+    with patch.object(adapter, '_matches', side_effect=AssertionError('Matched twice')):
+        assert adapter.allowed_methods() == {'DELETE', 'POST'}
+
+
+def _snapshot_rules() -> List[Rule]:
+    return [
+        Rule('/', ['GET'], 'index'),
+        Rule('/book/<int:page>', ['GET'], 'book'),
+        Rule('/files/<path:name>', ['GET'], 'files'),
+        Rule('/branch/', ['GET'], 'branch', defaults={'page': 1}),
+    ]
+
+
+def test_snapshot(tmpdir: Any) -> None:
+    path = str(tmpdir.join('routes.snapshot'))
+    assert not Map().load_snapshot(path)
+    map_ = Map()
+    for rule in _snapshot_rules():
+        map_.add(rule)
+    map_.save_snapshot(path)
+
+    loaded_map = Map()
+    assert loaded_map.load_snapshot(path)
+    with patch.object(Rule, 'bind', side_effect=AssertionError('Rule compiled')):
+        for rule in _snapshot_rules():
+            loaded_map.add(rule)
+    loaded_map.add(Rule('/new/<int:id>', ['GET'], 'new'))
+    _test_match(loaded_map, '/', 'GET', (loaded_map.endpoints['index'][0], {}))
+    _test_match(loaded_map, '/book/2', 'GET', (loaded_map.endpoints['book'][0], {'page': 2}))
+    _test_match(
+        loaded_map, '/files/a/b', 'GET', (loaded_map.endpoints['files'][0], {'name': 'a/b'}),
+    )
+    _test_match(loaded_map, '/new/3', 'GET', (loaded_map.endpoints['new'][0], {'id': 3}))
+    _test_match_redirect(loaded_map, '/branch', 'GET', '/branch/')
+    adapter = loaded_map.bind('http', '')
+    assert adapter.build('book', values={'page': 2}) == '/book/2'
+    assert adapter.build('branch') == '/branch/'
+
+
+def test_snapshot_invalid(tmpdir: Any) -> None:
+    path = str(tmpdir.join('routes.snapshot'))
+    with open(path, 'wb') as file_:
+        file_.write(b'invalid')
+    assert not Map().load_snapshot(path)
+    map_ = Map()
+    map_.add(Rule('/book/<int:page>', ['GET'], 'book'))
+    with patch('quart.routing.__version__', '0.0.0'):
+        map_.save_snapshot(path)
+    assert not Map().load_snapshot(path)
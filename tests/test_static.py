@@ -1,10 +1,16 @@
+import asyncio
+from hashlib import sha256
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import pytest
 
+from quart import Quart, url_for
 from quart.exceptions import NotFound
-from quart.static import safe_join, send_from_directory
+from quart.static import (
+    safe_join, send_file, send_from_directory, StaticCache, StaticFingerprints,
+)
+from quart.wrappers import FileBody, Response
 
 ROOT_PATH = Path(__file__).parents[0]
 
@@ -30,7 +36,344 @@ def test_safe_join_raises(directory: str, paths: List[str]) -> None:
         safe_join(directory, *paths)
 
 
+@pytest.mark.asyncio
+async def test_send_file() -> None:
+    app = Quart(__name__)
+    async with app.app_context():
+        response = await send_file(str(ROOT_PATH / 'test_static.py'))
+    assert isinstance(response.response, FileBody)
+    assert response.mimetype == 'text/x-python'
+    data = (ROOT_PATH / 'test_static.py').read_bytes()
+    assert response.headers['Content-Length'] == str(len(data))
+    assert (await response.get_data()) == data  # type: ignore
+
+
 @pytest.mark.asyncio
 async def test_send_from_directory_raises() -> None:
     with pytest.raises(NotFound):
         await send_from_directory(str(ROOT_PATH), 'no_file.no')
+
+
+@pytest.fixture(name='file_app')
+def _file_app() -> Quart:
+    app = Quart(__name__)
+
+    @app.route('/')
+    async def index() -> Response:
+        return await send_file(str(ROOT_PATH / 'test_static.py'))
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_send_file_not_modified(file_app: Quart) -> None:
+    test_client = file_app.test_client()
+    response = await test_client.get('/')
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+    response = await test_client.get('/', headers={'If-None-Match': f"W/{etag}"})
+    assert response.status_code == 304
+    assert (await response.get_data()) == b''  # type: ignore
+    response = await test_client.get('/', headers={'If-None-Match': '"other"'})
+    assert response.status_code == 200
+    response = await test_client.get('/', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+    response = await test_client.get(
+        '/', headers={'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT'},
+    )
+    assert response.status_code == 200
+    response = await test_client.get('/', headers={'If-Modified-Since': 'invalid'})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'range_, content_range, expected',
+    [
+        ('bytes=0-9', 'bytes 0-9/{size}', slice(0, 10)),
+        ('bytes=10-', 'bytes 10-{last}/{size}', slice(10, None)),
+        ('bytes=-10', 'bytes {suffix}-{last}/{size}', slice(-10, None)),
+        ('bytes=0-999999', 'bytes 0-{last}/{size}', slice(0, None)),
+    ],
+)
+async def test_send_file_range(
+        file_app: Quart, range_: str, content_range: str, expected: slice,
+) -> None:
+    data = (ROOT_PATH / 'test_static.py').read_bytes()
+    size = len(data)
+    test_client = file_app.test_client()
+    response = await test_client.get('/', headers={'Range': range_})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == content_range.format(
+        size=size, last=size - 1, suffix=size - 10,
+    )
+    assert response.headers['Content-Length'] == str(len(data[expected]))
+    assert (await response.get_data()) == data[expected]  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_send_file_multiple_ranges(file_app: Quart) -> None:
+    data = (ROOT_PATH / 'test_static.py').read_bytes()
+    test_client = file_app.test_client()
+    response = await test_client.get('/', headers={'Range': 'bytes=0-4,10-14'})
+    assert response.status_code == 206
+    assert response.mimetype == 'multipart/byteranges'
+    boundary = response.headers['Content-Type'].split('boundary=')[1]
+    body = await response.get_data()
+    assert response.headers['Content-Length'] == str(len(body))
+    assert body == (
+        f"\r\n--{boundary}\r\nContent-Type: text/x-python\r\n"
+        f"Content-Range: bytes 0-4/{len(data)}\r\n\r\n"
+    ).encode() + data[0:5] + (
+        f"\r\n--{boundary}\r\nContent-Type: text/x-python\r\n"
+        f"Content-Range: bytes 10-14/{len(data)}\r\n\r\n"
+    ).encode() + data[10:15] + f"\r\n--{boundary}--\r\n".encode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'range_, content_range',
+    [
+        ('bytes=0-4,3-9,10-14', 'bytes 0-14/{size}'),
+        ('bytes=10-14,0-1,0-1', None),
+    ],
+)
+async def test_send_file_merged_ranges(
+        file_app: Quart, range_: str, content_range: Optional[str],
+) -> None:
+    size = len((ROOT_PATH / 'test_static.py').read_bytes())
+    test_client = file_app.test_client()
+    response = await test_client.get('/', headers={'Range': range_})
+    assert response.status_code == 206
+    if content_range is None:  # Two merged spans, in order
+        body = await response.get_data()
+        assert body.index(b'bytes 0-1/') < body.index(b'bytes 10-14/')  # type: ignore
+        assert body.count(b'Content-Range') == 2  # type: ignore
+    else:
+        assert response.headers['Content-Range'] == content_range.format(size=size)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'range_', ['bytes=' + ','.join(['0-'] * 500), 'bytes=0-99,50-', 'bytes=' + ','.join(
+        f"{index}-{index}" for index in range(101)
+    )],
+)
+async def test_send_file_excessive_ranges(file_app: Quart, range_: str) -> None:
+    data = (ROOT_PATH / 'test_static.py').read_bytes()
+    test_client = file_app.test_client()
+    response = await test_client.get('/', headers={'Range': range_})
+    assert response.status_code == 200
+    assert (await response.get_data()) == data  # type: ignore
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('range_', ['bytes={size}-', 'bytes=-0', 'bytes=-0,{size}-'])
+async def test_send_file_range_not_satisfiable(file_app: Quart, range_: str) -> None:
+    size = len((ROOT_PATH / 'test_static.py').read_bytes())
+    test_client = file_app.test_client()
+    response = await test_client.get('/', headers={'Range': range_.format(size=size)})
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f"bytes */{size}"
+
+
+@pytest.mark.asyncio
+async def test_send_file_if_range(file_app: Quart) -> None:
+    test_client = file_app.test_client()
+    response = await test_client.get('/')
+    etag = response.headers['ETag']
+    last_modified = response.headers['Last-Modified']
+    for if_range in [etag, last_modified]:
+        response = await test_client.get('/', headers={'Range': 'bytes=0-9', 'If-Range': if_range})
+        assert response.status_code == 206
+    for if_range in ['"other"', 'Thu, 01 Jan 1970 00:00:00 GMT']:
+        response = await test_client.get('/', headers={'Range': 'bytes=0-9', 'If-Range': if_range})
+        assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_static_cache(tmpdir: Path) -> None:
+    app = Quart(__name__, static_folder=str(tmpdir), static_url_path='/static')
+    app.config['STATIC_CACHE_MAX_SIZE'] = 1024
+    app.config['STATIC_CACHE_REVALIDATE_INTERVAL'] = 60
+    tmpdir.join('style.css').write(b'body {}', mode='wb')  # type: ignore
+    test_client = app.test_client()
+    response = await test_client.get('/static/style.css')
+    assert response.mimetype == 'text/css'
+    assert (await response.get_data()) == b'body {}'  # type: ignore
+
+    tmpdir.join('style.css').write(b'p {}', mode='wb')  # type: ignore  # Not revalidated
+    response = await test_client.get('/static/style.css')
+    assert (await response.get_data()) == b'body {}'  # type: ignore
+    response = await test_client.get(
+        '/static/style.css', headers={'If-None-Match': response.headers['ETag']},
+    )
+    assert response.status_code == 304
+
+    app._static_cache.revalidate_interval = 0  # type: ignore
+    response = await test_client.get('/static/style.css')
+    assert (await response.get_data()) == b'p {}'  # type: ignore
+    response = await test_client.get('/static/style.css', headers={'Range': 'bytes=-2'})
+    assert response.status_code == 206
+    assert (await response.get_data()) == b'{}'  # type: ignore
+
+    tmpdir.join('style.css').remove()  # type: ignore
+    response = await test_client.get('/static/style.css')
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_static_cache_eviction(tmpdir: Path) -> None:
+    app = Quart(__name__)
+    cache = StaticCache(10, 6, 60)
+    for name in ['a', 'b', 'c']:
+        tmpdir.join(name).write(b'a' * 4, mode='wb')  # type: ignore
+    tmpdir.join('large').write(b'a' * 7, mode='wb')  # type: ignore
+    async with app.app_context():
+        for name in ['a', 'b', 'a', 'c']:
+            await cache.send_from_directory(str(tmpdir), name)
+        assert list(cache._files) == [
+            (str(tmpdir), 'a', 'identity'), (str(tmpdir), 'c', 'identity'),
+        ]
+        assert cache.size == 8
+        response = await cache.send_from_directory(str(tmpdir), 'large')
+        assert isinstance(response.response, FileBody)
+        assert len(cache) == 2
+        with pytest.raises(NotFound):
+            await cache.send_from_directory(str(tmpdir), 'missing')
+
+
+@pytest.mark.asyncio
+async def test_static_cache_concurrent_misses(tmpdir: Path) -> None:
+    app = Quart(__name__)
+    cache = StaticCache(10000, 5000, 60)
+    tmpdir.join('a').write(b'a' * 3000, mode='wb')  # type: ignore
+
+    async def send() -> None:
+        async with app.app_context():
+            await cache.send_from_directory(str(tmpdir), 'a')
+
+    await asyncio.gather(*(send() for _ in range(5)))
+    assert len(cache) == 1
+    assert cache.size == sum(len(cached.data) for cached in cache._files.values())
+    async with app.app_context():
+        tmpdir.join('b').write(b'b' * 3000, mode='wb')  # type: ignore
+        await cache.send_from_directory(str(tmpdir), 'b')
+        assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('max_size', [0, 1024])
+@pytest.mark.parametrize(
+    'accept_encoding, expected_encoding, expected_data',
+    [
+        ('gzip, deflate, br', 'br', b'br'),
+        ('gzip, deflate', 'gzip', b'gz'),
+        ('br;q=0.5, gzip', 'gzip', b'gz'),
+        ('deflate', None, b'js'),
+        ('br;q=0, gzip;q=0', None, b'js'),
+        ('', None, b'js'),
+    ],
+)
+async def test_send_precompressed(
+        tmpdir: Path,
+        max_size: int,
+        accept_encoding: str,
+        expected_encoding: Optional[str],
+        expected_data: bytes,
+) -> None:
+    app = Quart(__name__, static_folder=str(tmpdir), static_url_path='/static')
+    app.config['STATIC_CACHE_MAX_SIZE'] = max_size
+    app.config['STATIC_PRECOMPRESSED'] = True
+    for name, data in [('app.css', b'js'), ('app.css.br', b'br'), ('app.css.gz', b'gz')]:
+        tmpdir.join(name).write(data, mode='wb')  # type: ignore
+    test_client = app.test_client()
+    response = await test_client.get(
+        '/static/app.css', headers={'Accept-Encoding': accept_encoding},
+    )
+    assert response.mimetype == 'text/css'
+    assert response.headers.get('Content-Encoding') == expected_encoding
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert (await response.get_data()) == expected_data  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_send_precompressed_disabled(tmpdir: Path) -> None:
+    app = Quart(__name__, static_folder=str(tmpdir), static_url_path='/static')
+    for name, data in [('app.css', b'js'), ('app.css.gz', b'gz')]:
+        tmpdir.join(name).write(data, mode='wb')  # type: ignore
+    test_client = app.test_client()
+    response = await test_client.get('/static/app.css', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Vary' not in response.headers
+    assert (await response.get_data()) == b'js'  # type: ignore
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('max_size', [0, 1024])
+async def test_static_fingerprint(tmpdir: Path, max_size: int) -> None:
+    app = Quart(__name__, static_folder=str(tmpdir), static_url_path='/static')
+    app.config['STATIC_CACHE_MAX_SIZE'] = max_size
+    app.config['STATIC_FINGERPRINT'] = True
+    tmpdir.mkdir('css').join('app.css').write(b'body {}', mode='wb')  # type: ignore
+    digest = sha256(b'body {}').hexdigest()
+    async with app.test_request_context('GET', '/'):
+        assert url_for('static', filename='css/app.css') == '/static/css/app.css'
+        await app._get_static_fingerprints().load('css/app.css')
+        url = url_for('static', filename='css/app.css')
+        assert url == f"/static/css/app.{digest[:12]}.css"
+        assert url_for('static', filename='missing.css') == '/static/missing.css'
+
+    test_client = app.test_client()
+    response = await test_client.get(url)
+    assert response.mimetype == 'text/css'
+    assert response.headers['Cache-Control'] == 'public,max-age=31536000,immutable'
+    assert response.headers['ETag'] == f'"{digest}"'
+    assert (await response.get_data()) == b'body {}'  # type: ignore
+    response = await test_client.get(url, headers={'If-None-Match': f'"{digest}"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == f'"{digest}"'
+    assert response.headers['Cache-Control'] == 'public,max-age=31536000,immutable'
+    response = await test_client.get(
+        url, headers={'Range': 'bytes=0-3', 'If-Range': f'"{digest}"'},
+    )
+    assert response.status_code == 206
+    assert (await response.get_data()) == b'body'  # type: ignore
+
+    response = await test_client.get('/static/css/app.css')
+    assert 'Cache-Control' not in response.headers
+    response = await test_client.get(f"/static/css/app.{'0' * 12}.css")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_static_fingerprints(tmpdir: Path) -> None:
+    tmpdir.join('LICENSE').write(b'license', mode='wb')  # type: ignore
+    fingerprints = StaticFingerprints(str(tmpdir), 0)
+    digest = sha256(b'license').hexdigest()
+    fingerprinted = f"LICENSE.{digest[:12]}"
+    assert (await StaticFingerprints(str(tmpdir), 0).original(fingerprinted)) == ('LICENSE', digest)
+    assert fingerprints.fingerprint('LICENSE') == 'LICENSE'
+    await fingerprints.load('LICENSE')
+    assert fingerprints.fingerprint('LICENSE') == fingerprinted
+    assert (await fingerprints.original(fingerprinted)) == ('LICENSE', digest)
+    assert (await fingerprints.original('LICENSE')) is None
+    assert fingerprints.fingerprint('../LICENSE') == '../LICENSE'
+    await fingerprints.load('../LICENSE')
+    assert fingerprints.fingerprint('../LICENSE') == '../LICENSE'
+
+
+@pytest.mark.asyncio
+async def test_static_fingerprints_revalidate(tmpdir: Path) -> None:
+    tmpdir.join('LICENSE').write(b'license', mode='wb')  # type: ignore
+    fingerprints = StaticFingerprints(str(tmpdir), 0)
+    await fingerprints.load('LICENSE')
+    fingerprinted = fingerprints.fingerprint('LICENSE')
+    tmpdir.join('LICENSE').write(b'changed license', mode='wb')  # type: ignore
+    assert fingerprints.fingerprint('LICENSE') == 'LICENSE'
+    digest = sha256(b'changed license').hexdigest()
+    assert (await fingerprints.original(fingerprinted)) is None
+    assert (await fingerprints.original(f"LICENSE.{digest[:12]}")) == ('LICENSE', digest)
+    assert fingerprints.fingerprint('LICENSE') == f"LICENSE.{digest[:12]}"
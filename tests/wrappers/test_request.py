@@ -1,4 +1,5 @@
 import asyncio
+from unittest.mock import Mock
 from urllib.parse import urlencode
 
 import pytest
@@ -48,6 +49,23 @@ async def test_body_streaming_no_data() -> None:
     assert b'' == await body  # type: ignore
 
 
+@pytest.mark.asyncio
+async def test_body_flow_control() -> None:
+    body = Body(None)
+    pause = Mock()
+    resume = Mock()
+    body.set_flow_control(4, pause, resume)
+    body.append(b'01')
+    pause.assert_not_called()
+    body.append(b'23')
+    body.append(b'45')
+    pause.assert_called_once_with()
+    assert await body.__anext__() == b'01'
+    resume.assert_not_called()
+    assert await body.__anext__() == b'23'
+    resume.assert_called_once_with()
+
+
 def test_body_exceeds_max_content_length() -> None:
     max_content_length = 5
     body = Body(max_content_length)
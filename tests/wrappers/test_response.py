@@ -1,6 +1,8 @@
+from pathlib import Path
+
 import pytest
 
-from quart.wrappers.response import Response
+from quart.wrappers.response import FileBody, Response
 
 
 @pytest.mark.asyncio
@@ -11,6 +13,16 @@ async def test_response_body() -> None:
     assert b'Body' == (await response.get_data())  # type: ignore
 
 
+@pytest.mark.asyncio
+async def test_response_file_body(tmpdir: Path) -> None:
+    file_path = tmpdir.join('file')  # type: ignore
+    file_path.write(b'a' * 10 + b'b' * 10, mode='wb')
+    response = Response(FileBody(str(file_path), buffer_size=3))
+    assert response.headers['Content-Length'] == '20'
+    assert [data async for data in response.response][:2] == [b'aaa', b'aaa']
+    assert b'a' * 10 + b'b' * 10 == (await response.get_data())  # type: ignore
+
+
 def test_response_cache_control() -> None:
     response = Response(b'Body')
     response.cache_control.max_age = 2